@@ -1,3 +1,20 @@
+"""
+Command line for the game and its tools.
+
+Only argparse is loaded up front; every subcommand imports what it needs
+when it runs. Headless jobs (simulate, replay, the tools) skip the game
+modules they do not use, never open a curses screen and never wait for
+input, so a scheduler can start thousands of them.
+
+Usage:
+    python main.py                          play against the computer
+    python main.py demo                     input / list method demos
+    python main.py simulate --games 100     headless games, one JSON line each
+    python main.py replay game.jsonl --turn 40
+    python main.py bench --quick            any src module with a main(), e.g.
+    python main.py serve --port 7777        bench, serve, tournament, odds, ...
+"""
+
 __author__ = "Simon ;)"
 __date__ = "2026-01-05"
 __status__ = "100% - Overconfident Andy"
@@ -12,11 +29,164 @@ __lines_of_code__ = "Too many to count"
 __testing_strategy__ = "If it works on my machine, it ships"
 __future_self_note__ = "Don't write file metadata past 8pm"
 
-from src.battleship import main as callIT
-from src.rubric import run_extras_demo as methodsforMrG
+import argparse
+import importlib
+import sys
 
-if __name__ == "__main__":
-    # "Modularity"
-    callIT()
-    methodsforMrG()
+# Subcommands that are a module's own command line: name -> (module, help)
+TOOLS = {
+    "bench": ("src.bench", "benchmark the engine"),
+    "serve": ("src.server", "host games over a socket"),
+    "tournament": ("src.tournament", "parallel AI-vs-AI tournament"),
+    "batch": ("src.batch", "lockstep NumPy simulator for many games"),
+    "odds": ("src.odds", "win odds of a game in progress"),
+    "openings": ("src.openings", "build the density AI's opening book"),
+    "metrics": ("src.metrics", "per-turn timing metrics"),
+    "memory": ("src.memory", "memory held per live game"),
+}
+
+
+def check_strategies(*strategies):
+    """Exit with a usage message on an AI strategy Attack does not know."""
+    from src.battleship import STRATEGIES
+
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            sys.exit(f"unknown strategy {strategy!r} (choose from {', '.join(STRATEGIES)})")
+
+
+def board_size(text: str) -> int:
+    """argparse type for --size: a board side that fits the whole fleet."""
+    from src.battleship import FLEET
+
+    try:
+        size = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {text!r}")
+    if size < max(FLEET):
+        raise argparse.ArgumentTypeError(f"board must be at least {max(FLEET)}x{max(FLEET)}, got {size}")
+    return size
+
+
+def play(args):
+    from src.battleship import Game
+
+    check_strategies(args.strategy)
+    game = Game(p2_strategy=args.strategy, height=args.size, width=args.size,
+                animation_speed=args.speed)
+    game.main_loop()
+
+
+def demo(args):
+    # Blocks on input(), so it is its own subcommand
+    from src.rubric import run_extras_demo
+
+    run_extras_demo()
+
+
+def simulate(args):
+    import json
+    import random
+
+    from src.battleship import Game
+
+    check_strategies(args.p1_strategy, args.p2_strategy)
+    if args.events and args.games != 1:
+        sys.exit("--events records a single game; use it with --games 1")
+
+    log = None
+    if args.events:
+        from src.events import EventLog
+        log = EventLog(args.events)
 
+    for seed in range(args.seed, args.seed + args.games):
+        game = Game(headless=True, p1_strategy=args.p1_strategy, p2_strategy=args.p2_strategy,
+                    height=args.size, width=args.size, events=log, rng=random.Random(seed))
+        result = game.run_headless(args.max_turns)
+        print(json.dumps({"seed": seed, **result._asdict()}), flush=True)
+
+    if log is not None:
+        log.close()
+
+
+def replay(args):
+    import json
+
+    from src.events import EventLog, Replayer
+
+    game = Replayer(EventLog.load(args.log)).state_at(args.turn)
+    print(json.dumps({"turn": game.turns, "winner": game.get_winner()}))
+    for board, atk in ((game.p1, game.p2_atk), (game.p2, game.p1_atk)):
+        print(f"{board.name}: ships {sorted(board.typebyID.values())}, "
+              f"waiting {board.to_place}, shot at {atk.shots} times")
+        print(board_text(board, atk.hit_mask))
+
+
+def board_text(board, hits: int) -> str:
+    """
+    The board as text: ship sizes, '!' ship cells in `hits` (the
+    attacker's live hits), 'X' misses, '.' water.
+    """
+    rows = []
+    for y in range(board.height):
+        row = []
+        for x in range(board.width):
+            if board.is_blocked([y, x]):
+                row.append('X')
+            elif board.is_taken([y, x]):
+                row.append('!' if (hits >> (y * board.width + x)) & 1 else str(board.cell(y, x)))
+            else:
+                row.append('.')
+        rows.append(' '.join(row))
+    return '\n'.join(rows)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Battleship in the terminal, and its tools.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    sub = commands.add_parser("play", help="play against the computer (default)")
+    sub.add_argument('--size', type=board_size, default=10, help="board side")
+    sub.add_argument('--strategy', default="parity", help="computer AI: parity, density or exact")
+    sub.add_argument('--speed', type=float, default=1.0, help="hit animation speed, 0 to skip it")
+    sub.set_defaults(run=play)
+
+    sub = commands.add_parser("demo", help="input and list method demos")
+    sub.set_defaults(run=demo)
+
+    sub = commands.add_parser("simulate", help="headless AI-vs-AI games, one JSON result line each")
+    sub.add_argument('--games', type=int, default=1)
+    sub.add_argument('--seed', type=int, default=0, help="seed of the first game; the next ones count up")
+    sub.add_argument('--size', type=board_size, default=10, help="board side")
+    sub.add_argument('--p1-strategy', default="parity")
+    sub.add_argument('--p2-strategy', default="parity")
+    sub.add_argument('--max-turns', type=int, default=10000)
+    sub.add_argument('--events', help="record the game's event log here (with --games 1)")
+    sub.set_defaults(run=simulate)
+
+    sub = commands.add_parser("replay", help="show a recorded game at some turn")
+    sub.add_argument('log', help="event log written by simulate --events")
+    sub.add_argument('--turn', type=int, default=None, help="move to stop before (default: the end)")
+    sub.set_defaults(run=replay)
+
+    # Listed for --help; their arguments are parsed by the module itself
+    for name, (_, help_text) in TOOLS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if argv and argv[0] in TOOLS:
+        module = importlib.import_module(TOOLS[argv[0]][0])
+        # Usage lines of the tool read "main.py bench ..."
+        sys.argv[0] = f"{sys.argv[0]} {argv[0]}"
+        return module.main(argv[1:])
+
+    args = build_parser().parse_args(argv or ["play"])
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+animation.py
+
+Frame scheduling for the computer's shot animation.
+
+An animation gets a fixed time budget no matter how long its path is:
+the path is thinned to at most MAX_FRAMES frames, and each frame is shown
+until its slot in the budget ends. Waiting is done with a curses input
+timeout instead of time.sleep, so any keypress skips the rest of the
+animation straight away.
+
+A speed of 2.0 plays twice as fast; a speed of 0 turns animations off.
+"""
+
+import curses
+import time
+from typing import Callable, List, Sequence, Tuple
+
+# Seconds for the projectile's flight and the pause on impact, at speed 1
+FLIGHT_BUDGET = 1.2
+IMPACT_PAUSE = 0.6
+
+# Longest path shown; longer paths are thinned to this many frames
+MAX_FRAMES = 20
+
+
+class AnimationScheduler:
+    def __init__(self, speed: float = 1.0, flight_budget: float = FLIGHT_BUDGET,
+                 impact_pause: float = IMPACT_PAUSE, max_frames: int = MAX_FRAMES):
+        self.speed = speed
+        self.flight_budget = flight_budget
+        self.impact_pause = impact_pause
+        self.max_frames = max_frames
+
+    @property
+    def enabled(self) -> bool:
+        return self.speed > 0
+
+    def frames(self, path: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Thin `path` to at most max_frames steps, always keeping the last one."""
+        if not path:
+            return []
+        step = -(-len(path) // self.max_frames)  # Ceiling division
+        frames = list(path[:-1:step])
+        frames.append(path[-1])
+        return frames
+
+    def play(self, stdscr, path: Sequence[Tuple[int, int]],
+             draw: Callable[[Tuple[int, int]], None]) -> bool:
+        """
+        Call draw(step) for each frame of `path` on schedule, then hold the
+        last frame for the impact pause.
+
+        Returns:
+            True if the animation ran to the end, False if a key skipped it.
+        """
+        frames = self.frames(path)
+        if not self.enabled or not frames:
+            return True
+
+        frame_time = self.flight_budget / self.speed / len(frames)
+        start = time.monotonic()
+        try:
+            for i, step in enumerate(frames):
+                draw(step)
+                # Frame deadlines come from the start time, so slow draws
+                # shorten the wait instead of stretching the animation
+                deadline = start + (i + 1) * frame_time
+                if i == len(frames) - 1:
+                    deadline += self.impact_pause / self.speed
+                if self.wait(stdscr, deadline):
+                    # Skipped: still show where the shot landed
+                    if i < len(frames) - 1:
+                        draw(frames[-1])
+                    return False
+        finally:
+            stdscr.timeout(-1)
+        return True
+
+    @staticmethod
+    def wait(stdscr, deadline: float) -> bool:
+        """Wait until `deadline`; returns True if a key was pressed first."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        stdscr.timeout(max(1, int(remaining * 1000)))
+        return stdscr.getch() != curses.ERR
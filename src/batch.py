@@ -0,0 +1,469 @@
+"""
+batch.py
+
+Lockstep simulator for many headless AI-vs-AI games at once.
+
+Game keeps one object graph per game and spends most of its time in the
+interpreter, which caps a core at a few hundred games per second. Here K
+games live in stacked NumPy arrays instead, one plane per kind of cell
+state, and every turn advances all of them with a handful of array
+operations:
+
+- ship:  slot of the ship on each cell, -1 for open water
+- taken: cells with a ship (Board.taken_mask)
+- shot:  cells the other side has guessed (Attack.guess_mask)
+- miss:  guessed cells that were water (Board.blocked_mask)
+
+Planes are shaped (2, H*W, K): side (0 the Player's board, 1 the
+Computer's), cell, then game. Keeping the game axis last means each
+operation runs over long contiguous rows of games rather than over
+100-cell boards one at a time, which is several times faster in NumPy.
+Per-ship state is a (2, SLOTS, K) table of sizes (0 = free slot) and
+unhit cell counts.
+
+The rules are those of Game: a hit that sinks a ship takes it off the
+defender's board, clears the attacker's guesses there and earns the
+attacker a ship of that size, placed on its own board at once if it
+fits and deferred otherwise; get_winner decides when games end. Finished
+games are masked out and dropped from the arrays as they pile up.
+
+Both sides play the parity hunt/target AI. Targeting is vectorized too,
+and simpler than Game's: target mode shoots a random unguessed neighbour
+of any live hit instead of extending runs of hits along their axis, so
+batch games take more shots per sink than Game's parity AI and are not
+its seeded games move for move. The density and exact strategies are not
+vectorized; use src.tournament for those. Needs NumPy, unlike the rest
+of the game.
+
+One core plays about 50,000-65,000 10x10 games a minute this way, about
+ten times Game's parity rate. Millions of games a minute take a few
+dozen cores (--workers). Each batch gets its own seed, spawned from a
+SeedSequence of --seed.
+
+Usage:
+    sim = BatchSimulator(10000, seed=1)
+    results = sim.run()      # list of GameResult, one per game
+
+    python -m src.batch --games 1000000 --workers 8
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from src.battleship import FLEET, GameResult
+from src.bitboard import bit_positions, placement_table
+from src.solver import FLEET_DRAWS, random_fleet
+
+# Game.get_winner's words for a draw on points
+TIE = r"It's a tie!!! ;) No one"
+
+# Winner codes in BatchSimulator.winner
+PLAYING, PLAYER, COMPUTER, DRAW, UNDECIDED = -1, 0, 1, 2, 3
+WINNERS = {PLAYER: 'Player', COMPUTER: 'Computer', DRAW: TIE, UNDECIDED: None}
+
+# Ship slots per board; every ship in the game can end up on one side
+SLOTS = 2 * len(FLEET)
+
+# Drop finished games from the arrays once they are this share of them
+COMPACT_AT = 0.25
+
+# Games per BatchSimulator in main
+BATCH = 10000
+
+
+class BatchSimulator:
+    def __init__(self, count: int, height: int = 10, width: int = 10,
+                 seed: Union[int, np.random.SeedSequence, None] = None, max_turns: int = 10000):
+        """
+        `count` fresh games with random fleets and turn order; seed (an
+        int or a SeedSequence) makes the whole batch reproducible. max_turns is Game.run_headless's
+        safety net.
+        """
+        if min(height, width) < max(FLEET):
+            raise ValueError(f"Board must be at least {max(FLEET)}x{max(FLEET)}")
+        self.count = count
+        self.height = height
+        self.width = width
+        self.cells = height * width
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+        self.turn = 0
+
+        # Ship sizes, and every placement of each as a (placements, cells) plane
+        self.sizes = sorted(set(FLEET), reverse=True)
+        self.placements = {size: self.placement_planes(size) for size in self.sizes}
+        # The same, transposed to float for counting overlaps with a matrix product
+        self.overlap = {size: planes.T.astype(np.float32) for size, planes in self.placements.items()}
+
+        # Hunt parity pattern per smallest ship size, (y + x) % size == 0,
+        # as a (cells, size) table
+        y, x = np.indices((height, width)).reshape(2, -1)
+        self.parity = np.stack([(y + x) % max(size, 1) == 0 for size in range(max(FLEET) + 1)], axis=1)
+
+        shape = (2, self.cells, count)
+        self.ship = np.full(shape, -1, dtype=np.int8)
+        self.taken = np.zeros(shape, dtype=bool)
+        self.shot = np.zeros(shape, dtype=bool)
+        self.miss = np.zeros(shape, dtype=bool)
+        self.size = np.zeros((2, SLOTS, count), dtype=np.int8)
+        self.unhit = np.zeros((2, SLOTS, count), dtype=np.int8)
+        # Earned ships waiting for room, per size in self.sizes order
+        self.pending = np.zeros((2, len(self.sizes), count), dtype=np.int16)
+        # Pending sizes that did not fit last time; only a sink on that
+        # board frees cells, so they are not retried until then
+        self.stuck = np.zeros((2, len(self.sizes), count), dtype=bool)
+        # Guessed cells of each board (Attack.guess_count of its attacker)
+        self.guesses = np.zeros((2, count), dtype=np.int32)
+
+        # Per attacking side, as in GameResult
+        self.shots = np.zeros((2, count), dtype=np.int32)
+        self.earned = np.zeros((2, count), dtype=np.int32)
+        self.deferred = np.zeros((2, count), dtype=np.int32)
+
+        # Side that moves first (Game.start). Games where the Player starts
+        # come first, so on every turn each side attacks in one contiguous
+        # block of columns and planes can be sliced instead of gathered.
+        first = self.rng.integers(0, 2, count, dtype=np.int8)
+        self.player_first = int((first == 0).sum())
+        # Game in each column, -1 once it finished; those columns are dropped over time
+        self.ids = np.argsort(first, kind='stable')
+
+        # Final results, indexed by game
+        self.winner = np.full(count, PLAYING, dtype=np.int8)
+        self.turns = np.zeros(count, dtype=np.int32)
+        self.by_score = np.zeros(count, dtype=bool)
+        self.final_shots = np.zeros((2, count), dtype=np.int32)
+        self.final_earned = np.zeros((2, count), dtype=np.int32)
+        self.final_deferred = np.zeros((2, count), dtype=np.int32)
+
+        self.place_fleets()
+
+    def placement_planes(self, size: int) -> np.ndarray:
+        """Every on-board placement of a ship of `size` as a (placements, cells) bool array."""
+        table = placement_table(self.height, self.width, size)
+        planes = np.zeros((len(table), self.cells), dtype=bool)
+        for i, (mask, _) in enumerate(table):
+            planes[i, list(bit_positions(mask))] = True
+        return planes
+
+    @property
+    def columns(self) -> int:
+        """Games in the arrays, finished ones not yet dropped included."""
+        return len(self.ids)
+
+    @property
+    def live(self) -> int:
+        """Games still being played."""
+        return int((self.ids >= 0).sum())
+
+    def place_fleets(self):
+        """
+        Random starting fleets for both sides of every game. Like
+        solver.random_fleet: whole-fleet draws, redrawn for the boards
+        where ships overlap (uniform over layouts), and random_fleet
+        itself for the few boards still left after FLEET_DRAWS rounds.
+        """
+        boards = 2 * self.count
+        ship = np.full((boards, self.cells), -1, dtype=np.int8)
+        todo = np.arange(boards)
+
+        for _ in range(FLEET_DRAWS):
+            if not len(todo):
+                break
+            layout = np.full((len(todo), self.cells), -1, dtype=np.int8)
+            overlaps = np.zeros(len(todo), dtype=bool)
+            for slot, size in enumerate(FLEET):
+                planes = self.placements[size]
+                cells = planes[self.rng.integers(0, len(planes), len(todo))]
+                overlaps |= (cells & (layout >= 0)).any(axis=1)
+                layout[cells] = slot
+            ship[todo[~overlaps]] = layout[~overlaps]
+            todo = todo[overlaps]
+
+        # Crowded boards: the exact sampler, one board at a time
+        for board in todo:
+            side, game = divmod(int(board), self.count)
+            rng = random.Random(int(self.rng.integers(1 << 63)))
+            masks = random_fleet(self.height, self.width, FLEET, 0, rng)
+            if masks is None:
+                # Nothing fits: the whole fleet waits, as Board.auto_place_ships does
+                for size in FLEET:
+                    self.pending[side, self.sizes.index(size), game] += 1
+                continue
+            for slot, mask in enumerate(masks):
+                ship[board, list(bit_positions(mask))] = slot
+
+        # Board b is side b // count of game b % count; columns follow self.ids
+        self.ship[:] = ship.reshape(2, self.count, self.cells)[:, self.ids].transpose(0, 2, 1)
+        self.pending[:] = self.pending[..., self.ids]
+        self.taken[:] = self.ship >= 0
+        # Ship i of FLEET is in slot i on every board that got its fleet
+        placed = self.taken.any(axis=1)
+        self.size[:, :len(FLEET)] = np.where(placed[:, None, :], np.array(FLEET, dtype=np.int8)[:, None], 0)
+        self.unhit[:] = self.size
+
+    def step(self):
+        """Play one move in every live game."""
+        if not self.live:
+            return
+
+        # The Player started the games left of the split, so it moves there
+        # on even turns, and the Computer does
+        split = self.player_first
+        turn = self.turn % 2
+        for columns, attacker in ((slice(0, split), turn), (slice(split, self.columns), 1 - turn)):
+            defender = 1 - attacker
+            # Sides with every cell guessed pass (Game.auto_move)
+            shooting = (self.ids[columns] >= 0) & (self.guesses[defender, columns] < self.cells)
+            if not shooting.any():
+                continue
+            cells = self.pick_shots(columns, defender)[shooting]
+            games = np.flatnonzero(shooting) + columns.start
+            sides = np.full(len(games), attacker)
+            self.fire(games, sides, 1 - sides, cells)
+            self.place_pending(games, sides)
+
+        self.turn += 1
+        self.check_winners()
+
+    def pick_shots(self, columns: slice, defender: int) -> np.ndarray:
+        """
+        The parity AI's next cell (flat index) against `defender`'s board
+        in each game of `columns`: next to a live hit if there is one,
+        else a random unguessed cell of the parity pattern for the
+        smallest live ship.
+        """
+        height, width = self.height, self.width
+        guessed = self.shot[defender, :, columns]
+        hits = guessed & self.taken[defender, :, columns]
+        unguessed = ~guessed
+
+        # Target mode: open cells next to live hits
+        near = np.zeros_like(hits)
+        near[width:] |= hits[:-width]
+        near[:-width] |= hits[width:]
+        # Left and right: as (row, column, games) so rows do not wrap
+        near_rows = near.reshape(height, width, -1)
+        hit_rows = hits.reshape(height, width, -1)
+        near_rows[:, 1:] |= hit_rows[:, :-1]
+        near_rows[:, :-1] |= hit_rows[:, 1:]
+        candidates = near & unguessed
+        targeting = candidates.any(axis=0)
+
+        # Hunt mode: parity by the smallest ship still afloat (2 if none),
+        # any unguessed cell once the pattern is used up
+        sizes = self.size[defender, :, columns]
+        smallest = np.where(sizes > 0, sizes, 127).min(axis=0)
+        smallest[smallest == 127] = 2
+        hunt = np.zeros_like(unguessed)
+        for size in np.unique(smallest):
+            hunt |= self.parity[:, size, None] & (smallest == size)
+        hunt &= unguessed
+        hunt |= unguessed & ~hunt.any(axis=0)
+        candidates |= hunt & ~targeting
+
+        # The k-th candidate for a random k: the number of cells whose
+        # running candidate count is still <= k. A loop over the cells
+        # beats np.cumsum along the short axis by several times.
+        count = candidates.sum(axis=0, dtype=np.int32)
+        pick = (self.rng.random(len(count)) * count).astype(np.int32)
+        running = np.zeros_like(pick)
+        cells = np.zeros_like(pick)
+        for row in candidates:
+            running += row
+            cells += running <= pick
+        return cells
+
+    def fire(self, games: np.ndarray, attacker: np.ndarray, defender: np.ndarray, cells: np.ndarray):
+        """Resolve one shot per game, as Attack.shoot and Attack.onhit."""
+        # Shots always go to unguessed cells
+        self.shot[defender, cells, games] = True
+        self.guesses[defender, games] += 1
+        self.shots[attacker, games] += 1
+
+        slots = self.ship[defender, cells, games].astype(np.intp)
+        hit = slots >= 0
+        self.miss[defender[~hit], cells[~hit], games[~hit]] = True
+
+        games, attacker, defender, slots = games[hit], attacker[hit], defender[hit], slots[hit]
+        self.unhit[defender, slots, games] -= 1
+        sunk = self.unhit[defender, slots, games] == 0
+        if not sunk.any():
+            return
+
+        # Sunk: off the defender's board, out of the attacker's guesses,
+        # and a ship of that size for the attacker
+        games, attacker, defender, slots = games[sunk], attacker[sunk], defender[sunk], slots[sunk]
+        sizes = self.size[defender, slots, games]
+        ship = self.ship[defender, :, games]
+        gone = ship == slots[:, None]
+        self.ship[defender, :, games] = np.where(gone, -1, ship)
+        self.taken[defender, :, games] &= ~gone
+        self.shot[defender, :, games] &= ~gone
+        self.guesses[defender, games] -= sizes
+        self.size[defender, slots, games] = 0
+        self.stuck[defender, :, games] = False
+        for j, size in enumerate(self.sizes):
+            earned = sizes == size
+            self.pending[attacker[earned], j, games[earned]] += 1
+        self.earned[attacker, games] += 1
+
+    def place_pending(self, games: np.ndarray, side: np.ndarray):
+        """
+        Put each side's earned ships on its board at a random legal
+        placement, largest first; ships that fit nowhere stay pending and
+        count as deferred (Game.auto_place_pending).
+        """
+        for j, size in enumerate(self.sizes):
+            pending = self.pending[side, j, games]
+            stuck = self.stuck[side, j, games]
+            self.deferred[side[stuck], games[stuck]] += pending[stuck]
+            waiting = (pending > 0) & ~stuck
+            g, s = games[waiting], side[waiting]
+            while len(g):
+                # Legal placements avoid ships and the opponent's misses
+                occupied = (self.taken[s, :, g] | self.miss[s, :, g]).astype(np.float32)
+                legal = occupied @ self.overlap[size] == 0
+
+                fits = legal.any(axis=1)
+                self.deferred[s[~fits], g[~fits]] += self.pending[s[~fits], j, g[~fits]]
+                self.stuck[s[~fits], j, g[~fits]] = True
+                g, s, legal = g[fits], s[fits], legal[fits]
+                if not len(g):
+                    break
+
+                scores = self.rng.random(legal.shape, dtype=np.float32)
+                scores[~legal] = -1
+                cells = self.placements[size][scores.argmax(axis=1)]
+                slots = (self.size[s, :, g] == 0).argmax(axis=1)
+                self.ship[s, :, g] = np.where(cells, slots[:, None].astype(np.int8), self.ship[s, :, g])
+                self.taken[s, :, g] |= cells
+                self.size[s, slots, g] = size
+                self.unhit[s, slots, g] = size
+                self.pending[s, j, g] -= 1
+
+                more = self.pending[s, j, g] > 0
+                g, s = g[more], s[more]
+
+    def check_winners(self):
+        """Game.get_winner for every live game; finished ones are recorded and masked out."""
+        alive = (self.size > 0).any(axis=1)
+        score = self.size.sum(axis=1, dtype=np.int32)
+        # Side s has guesses left on the other side's board
+        left = (self.guesses < self.cells)[::-1]
+
+        winner = np.full(self.columns, PLAYING, dtype=np.int8)
+        winner[alive[0] & ~alive[1]] = PLAYER
+        winner[alive[1] & ~alive[0]] = COMPUTER
+
+        # Out of guesses: remaining ship points decide; a draw only
+        # ends the game when both sides are out
+        undecided = winner == PLAYING
+        out = ~left[0] | ~left[1]
+        ahead = score[0] - score[1]
+        winner[undecided & out & (ahead > 0)] = PLAYER
+        winner[undecided & out & (ahead < 0)] = COMPUTER
+        winner[undecided & ~left[0] & ~left[1] & (ahead == 0)] = DRAW
+
+        if self.turn >= self.max_turns:
+            winner[winner == PLAYING] = UNDECIDED
+
+        finished = (winner != PLAYING) & (self.ids >= 0)
+        if not finished.any():
+            return
+        ids = self.ids[finished]
+        self.winner[ids] = winner[finished]
+        self.turns[ids] = self.turn
+        self.by_score[ids] = (alive[0, finished] == alive[1, finished]) & (winner[finished] != UNDECIDED)
+        self.final_shots[:, ids] = self.shots[:, finished]
+        self.final_earned[:, ids] = self.earned[:, finished]
+        self.final_deferred[:, ids] = self.deferred[:, finished]
+        self.ids[finished] = -1
+        if (self.ids < 0).mean() >= COMPACT_AT:
+            self.compact()
+
+    def compact(self):
+        """Drop the columns of finished games from every per-game array."""
+        keep = self.ids >= 0
+        self.player_first = int(keep[:self.player_first].sum())
+        for name in ('ship', 'taken', 'shot', 'miss', 'size', 'unhit', 'pending', 'stuck', 'guesses',
+                     'shots', 'earned', 'deferred', 'ids'):
+            setattr(self, name, getattr(self, name)[..., keep])
+
+    def run(self) -> List[GameResult]:
+        """Play every game to the end."""
+        while self.live:
+            self.step()
+        return self.results()
+
+    def results(self) -> List[GameResult]:
+        """A GameResult per game, in game order (unfinished games have winner None)."""
+        return [
+            GameResult(
+                winner=WINNERS.get(int(self.winner[i])),
+                turns=int(self.turns[i]),
+                p1_shots=int(self.final_shots[0, i]),
+                p2_shots=int(self.final_shots[1, i]),
+                p1_ships_earned=int(self.final_earned[0, i]),
+                p2_ships_earned=int(self.final_earned[1, i]),
+                p1_deferred=int(self.final_deferred[0, i]),
+                p2_deferred=int(self.final_deferred[1, i]),
+                by_score=bool(self.by_score[i]),
+            )
+            for i in range(self.count)
+        ]
+
+
+def play_batch(task: Tuple[int, int, np.random.SeedSequence]) -> Tuple[Counter, int]:
+    """Worker entry point: play one batch; returns (winner counts, total turns)."""
+    count, size, seed = task
+    sim = BatchSimulator(count, size, size, seed=seed)
+    sim.run()
+    return Counter(WINNERS[int(code)] for code in sim.winner), int(sim.turns.sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless AI-vs-AI games in lockstep.")
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=BATCH, help="games per batch held in memory")
+    parser.add_argument('--size', type=int, default=10, help="board side")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="processes playing batches (0: every core)")
+    args = parser.parse_args(argv)
+
+    # Independent streams per batch: seed + offset would give runs with
+    # nearby --seed values most of the same games
+    firsts = range(0, args.games, args.batch)
+    seeds = np.random.SeedSequence(args.seed).spawn(len(firsts))
+    tasks = [(min(args.batch, args.games - first), args.size, batch_seed)
+             for first, batch_seed in zip(firsts, seeds)]
+    workers = args.workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    winners = Counter()
+    turns = 0
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            outcomes = list(pool.map(play_batch, tasks))
+    else:
+        outcomes = [play_batch(task) for task in tasks]
+    for batch_winners, batch_turns in outcomes:
+        winners.update(batch_winners)
+        turns += batch_turns
+    seconds = time.perf_counter() - start
+
+    print(f"{args.games} games in {seconds:.1f}s ({args.games / seconds * 60:,.0f} games/min), "
+          f"{turns / args.games:.1f} turns on average")
+    for winner, count in winners.most_common():
+        print(f"  {winner or 'no winner'}: {count / args.games:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,304 @@
 import curses
 import sys
-from typing import Dict, List
+from array import array
+from typing import Dict, List, NamedTuple, Optional
 import time
-from random import randint, shuffle, choice
-from copy import deepcopy
+from time import perf_counter
+from collections import Counter
+import random
+
+from src.bitboard import (TABLE_MAX_CELLS, bit_positions, cell_bit, cells_to_mask, cover_tables,
+                          free_placements, full_mask, mask_cells, mask_to_coords, nth_bit,
+                          parity_mask, placement_count, placement_table, runs_through,
+                          sliced_add, sliced_argmax)
+from src.animation import AnimationScheduler
+from src.render import ScreenRenderer
+from src.openings import opening_book
+from src.solver import random_fleet, solve_attack
+
+# Ship sizes every fleet starts with
+FLEET = (2, 3, 4, 5)
+
+# Random tries before a large board falls back to an exhaustive scan
+RANDOM_TRIES = 64
+
+# AI shot-selection strategies understood by Attack
+STRATEGIES = ("parity", "density", "exact")
+
+# Density targeting: each known hit a placement covers multiplies its weight by this
+DENSITY_HIT_WEIGHT = 20
+
+# Exact targeting gives up (and uses density) above this many possible
+# layouts up front, or after this many search nodes (about 20ms)
+EXACT_MAX_BOUND = 10 ** 5
+EXACT_MAX_NODES = 5000
+
+
+class GameResult(NamedTuple):
+    """Summary of one finished headless game."""
+    winner: Optional[str]   # get_winner() value, or None if max_turns ran out
+    turns: int              # Moves played by both sides together
+    p1_shots: int           # Shots fired by the Player side
+    p2_shots: int           # Shots fired by the Computer side
+    p1_ships_earned: int    # Ships the Player side sank and re-earned
+    p2_ships_earned: int    # Ships the Computer side sank and re-earned
+    p1_deferred: int        # Turns an earned Player ship had to wait in to_place
+    p2_deferred: int        # Turns an earned Computer ship had to wait in to_place
+    by_score: bool          # True if get_winner decided on remaining ship points
+
+
+def viewport(focus, height, width, max_y, max_x):
+    """
+    Pick which part of a board fits on screen, keeping `focus` in view.
+
+    Cells are drawn 4 columns apart starting on screen row 1.
+
+    Returns:
+        (top, left, rows, cols): first board row/column shown and how many fit.
+    """
+    rows = max(0, min(height, max_y - 1))
+    cols = max(0, min(width, (max_x + 3) // 4))
+    top = min(max(0, focus[0] - rows // 2), height - rows)
+    left = min(max(0, focus[1] - cols // 2), width - cols)
+    return top, left, rows, cols
+
+
+def density_targets(height, width, fleet, miss_mask, hit_mask, guess_mask) -> int:
+    """
+    Cells the density heat map rates highest, as a mask; 0 when no legal
+    placement covers an unguessed cell. fleet maps ship size -> count.
+    See Attack.pick_density_shot.
+    """
+    unguessed = full_mask(height, width) & ~guess_mask
+    heat: list[int] = []
+
+    for size, ships in fleet.items():
+        for mask, _ in placement_table(height, width, size):
+            # Ships never sit on a known miss
+            if mask & miss_mask:
+                continue
+            # Nothing left to learn from this placement
+            if not mask & unguessed:
+                continue
+            hits = (mask & hit_mask).bit_count()
+            sliced_add(heat, mask, ships * DENSITY_HIT_WEIGHT ** hits)
+
+    covered = 0
+    for level in heat:
+        covered |= level
+    if not covered & unguessed:
+        return 0
+    return sliced_argmax(heat, unguessed & covered)
 
 
 class Game:
-    def __init__(self):
+    __slots__ = ('height', 'width', 'headless', 'stdscr', 'messages', 'messages_shown', 'rng',
+                 'events', 'metrics',
+                 'animator', 'ship_id_counter', 'turns', 'started', 'p1_first',
+                 'p1', 'p2', 'p1_atk', 'p2_atk', 'moves')
+
+    def __init__(self, headless=False, p1_strategy="parity", p2_strategy="parity",
+                 height=10, width=10, animation_speed=1.0, place_ships=True,
+                 events=None, rng=None, metrics=None):
+        """
+        place_ships=False leaves both boards empty; used when a game is
+        rebuilt from a snapshot (see src/snapshot.py).
+        events: optional EventLog (see src/events.py) that records every
+        state change of this game.
+        rng: random.Random used for every random choice in this game; pass
+        random.Random(seed) to make the game reproducible.
+        metrics: optional Metrics (see src/metrics.py) that times turns,
+        AI, placement, hits and rendering.
+        """
+        # The largest ship has to fit in both directions
+        if min(height, width) < max(FLEET):
+            raise ValueError(f"Board must be at least {max(FLEET)}x{max(FLEET)}")
+
+        # Board dimensions shared by both sides
+        self.height = height
+        self.width = width
+
+        # Headless games have no curses, no sleeps and no prints
+        self.headless = headless
+
+        # Curses window of the running session (see main_loop), the
+        # messages logged while it owns the terminal, and how many of
+        # them the status line has shown already
+        self.stdscr = None
+        self.messages: List[str] = []
+        self.messages_shown = 0
+
+        # Source of all randomness in this game (placements, turn order, AI)
+        self.rng = rng if rng is not None else random.Random()
+
+        # Replay log; None means nothing is recorded
+        self.events = events
+        # Timing metrics; None means nothing is measured
+        self.metrics = metrics
+        self.record("game", height, width, headless, p1_strategy, p2_strategy)
+
+        # Computer shot animation; speed 0 (or headless) turns it off
+        self.animator = AnimationScheduler(speed=0 if headless else animation_speed)
+
         # Global ship ID counter to uniquely identify each ship
         self.ship_id_counter = 0
 
-        # Create player and computer boards
-        self.p1 = Board('Player', self)
-        self.p2 = Board('Computer', self)
-
-        # Player manually places ships, computer auto-places
-        self.p1.place_initial_boats()
-        self.p2.auto_place_ships()
+        # Moves played so far, whether the turn order has been drawn, and
+        # whether the Player side moves first
+        self.turns = 0
+        self.started = False
+        self.p1_first = True
+
+        # Create player and computer boards; large boards keep their
+        # cells in sets instead of board-sized ints
+        sparse = height * width > TABLE_MAX_CELLS
+        board_class = SparseBoard if sparse else Board
+        attack_class = SparseAttack if sparse else Attack
+        self.p1 = board_class('Player', self)
+        self.p2 = board_class('Computer', self)
+
+        # Player manually places ships (once main_loop opens the screen),
+        # computer auto-places
+        if place_ships:
+            if headless:
+                self.p1.auto_place_ships()
+            self.p2.auto_place_ships()
 
         # Attack controllers for each side
-        self.p1_atk = Attack(player=self.p1, opp=self.p2)
-        self.p2_atk = Attack(player=self.p2, opp=self.p1)
+        # (strategy only matters for AI-driven sides: "parity", "density" or "exact")
+        self.p1_atk = attack_class(player=self.p1, opp=self.p2, auto=headless, strategy=p1_strategy)
+        self.p2_atk = attack_class(player=self.p2, opp=self.p1, auto=True, strategy=p2_strategy)
 
-        # Turn order list; will be shuffled so start player is random
-        self.moves = [self.move, self.auto_move]
+        # Each side's move, Player first; start() draws which one opens
+        if headless:
+            self.moves = [self.player_auto_move, self.auto_move]
+        else:
+            self.moves = [self.move, self.auto_move]
 
     def main_loop(self):
-        # Randomize who starts (player or computer)
-        shuffle(self.moves)
+        # One curses session for the whole game; screens switch inside it
+        winner = curses.wrapper(self.play_session)
 
-        # Main game loop
-        while True:
-            for func in self.moves:
+        # Terminal is restored now, so messages can be printed normally
+        for message in self.messages:
+            print(message)
+        self.messages.clear()
+        self.messages_shown = 0
+        print(f"{winner} wins!")
+
+    def play_session(self, stdscr):
+        """
+        Place the player's fleet and play turns until there is a winner,
+        all on one curses screen. Returns the winner.
+        """
+        self.stdscr = stdscr
+        try:
+            # A resumed game already has its fleet and turn order
+            if not self.started:
+                self.p1.place_initial_boats()
+                self.start()
+
+            # Main game loop
+            while True:
                 # Execute one turn (player move or computer move)
-                func()
+                self.play_turn()
 
                 # Check for winner after each move
                 winner = self.get_winner()
                 if winner is not None:
-                    print(f"{winner} wins!")
-                    return  # Exit the game loop cleanly
+                    return winner
+        finally:
+            self.stdscr = None
+
+    def start(self):
+        """Randomize who starts (player or computer), once per game."""
+        if not self.started:
+            # The same draw a shuffle of the two moves would make
+            self.p1_first = self.rng.randrange(2) == 1
+            self.started = True
+            self.record("start", self.p1_first)
+
+    def next_side(self) -> int:
+        """Index into moves of the side whose move is next (0 = Player)."""
+        return (self.turns + (not self.p1_first)) % 2
+
+    def play_turn(self):
+        """Play the next move in turn order."""
+        self.record("turn", self.turns)
+        side = self.next_side()
+        move = self.moves[side]
+        if self.metrics is None:
+            move()
+        else:
+            start = perf_counter()
+            move()
+            name = self.p1.name if side == 0 else self.p2.name
+            self.metrics.end_turn(self.turns, name, perf_counter() - start)
+        self.turns += 1
+
+    def run_screen(self, screen):
+        """
+        Run `screen(stdscr)` on the session's window, or in a one-off
+        curses.wrapper when no session is open.
+        """
+        if self.stdscr is not None:
+            return screen(self.stdscr)
+        return curses.wrapper(screen)
+
+    def run_headless(self, max_turns=10000) -> GameResult:
+        """
+        Play a full AI-vs-AI game without rendering and return its summary.
+        Only meant for games created with headless=True. A resumed game
+        carries on from its current turn; max_turns counts the whole game.
+
+        One core plays on the order of 100 parity games a second, density
+        and exact far fewer; for bulk runs spread games over processes
+        (src.tournament) or use the lockstep simulator (src.batch).
+        """
+        self.start()
+
+        while self.turns < max_turns:
+            self.play_turn()
+
+            winner = self.get_winner()
+            if winner is not None:
+                return self.result(winner, self.turns)
+
+        # Safety net: give up instead of looping forever
+        return self.result(None, self.turns)
+
+    def result(self, winner, turns) -> GameResult:
+        """Bundle the end-of-game counters into a GameResult."""
+        return GameResult(
+            winner=winner,
+            turns=turns,
+            p1_shots=self.p1_atk.shots,
+            p2_shots=self.p2_atk.shots,
+            p1_ships_earned=self.p1_atk.ships_earned,
+            p2_ships_earned=self.p2_atk.ships_earned,
+            p1_deferred=self.p1.deferred,
+            p2_deferred=self.p2.deferred,
+            # Sinking a whole fleet leaves exactly one side alive; a game
+            # cut off at max_turns has no winner and was not decided at all
+            by_score=winner is not None and self.p1.has_live_ships() == self.p2.has_live_ships(),
+        )
+
+    def record(self, *event):
+        """Append an event to the replay log, if this game keeps one."""
+        if self.events is not None:
+            self.events.append(event)
+
+    def log(self, message):
+        """
+        Print a game message, unless running headless. While a curses
+        session is open the message is kept for the status line instead.
+        """
+        if self.headless:
+            return
+        if self.stdscr is not None:
+            self.messages.append(message)
+        else:
+            print(message)
 
     def move(self):
         # Human player object
@@ -55,32 +313,80 @@ class Game:
 
         for pending in ships_to_place:
             # Only place a ship if there is at least one legal placement
-            if obj.is_possible(pending):
+            if self.can_place(obj, pending):
                 obj.place_boat(pending)
             else:
                 # Re-queue ships that currently cannot be placed
                 obj.to_place.append(pending)
+                obj.deferred += 1
+                self.record("defer", obj.name, pending)
 
     def auto_move(self):
         # Computer player object
         obj = self.p2
 
+        # Nothing left to shoot at; pass the turn
+        if not self.p2_atk.has_guesses_left():
+            return
+
         # AI chooses a target and resolves the shot
-        shot = self.p2_atk.auto_pick_target()
+        shot = self.auto_shot(self.p2_atk)
 
         # If the shot hit the player, show an animation
-        if shot in self.p1.hit_coors:
-            curses.wrapper(lambda stdscr: self.p2_atk.animate_computer_hit(stdscr, shot))
+        if self.animator.enabled and self.p1.is_hit(shot):
+            start = perf_counter()
+            self.run_screen(lambda stdscr: self.p2_atk.animate_computer_hit(stdscr, shot))
+            if self.metrics is not None:
+                self.metrics.observe("animation", perf_counter() - start)
 
         # After shooting, place any ships the computer earned
+        self.auto_place_pending(obj)
+
+    def player_auto_move(self):
+        """Headless stand-in for move(): the AI plays the Player side."""
+        if not self.p1_atk.has_guesses_left():
+            return
+
+        self.auto_shot(self.p1_atk)
+        self.auto_place_pending(self.p1)
+
+    def auto_shot(self, atk):
+        """Let `atk`'s AI pick and fire a shot; returns the shot."""
+        if self.metrics is None:
+            return atk.auto_pick_target()
+        start = perf_counter()
+        shot = atk.auto_pick_target()
+        self.metrics.observe("pick_target", perf_counter() - start)
+        return shot
+
+    def auto_place_pending(self, obj):
+        """Auto-place every earned ship that fits; re-queue the rest."""
         ships_to_place = obj.to_place.copy()
         obj.to_place.clear()
 
+        if not ships_to_place:
+            return
+        start = perf_counter()
+
         for pending in ships_to_place:
             if obj.is_possible(pending):
                 obj.auto_place(pending)
             else:
                 obj.to_place.append(pending)
+                obj.deferred += 1
+                self.record("defer", obj.name, pending)
+
+        if self.metrics is not None:
+            self.metrics.observe("placement", perf_counter() - start)
+
+    def can_place(self, obj, boat_size):
+        """obj.is_possible(boat_size), timed as placement when metrics are on."""
+        if self.metrics is None:
+            return obj.is_possible(boat_size)
+        start = perf_counter()
+        possible = obj.is_possible(boat_size)
+        self.metrics.observe("placement", perf_counter() - start)
+        return possible
     
     def new_ship_id(self):
         # Generate a new unique ship ID
@@ -103,9 +409,9 @@ class Game:
         if p2_alive and not p1_alive:
             return 'Computer'
 
-        # Check remaining guesses (each board has 100 cells)
-        p1_has_guesses_left = len(self.p1_atk.guesses) < 100
-        p2_has_guesses_left = len(self.p2_atk.guesses) < 100
+        # Check remaining guesses (one per cell of the opponent's board)
+        p1_has_guesses_left = self.p1_atk.has_guesses_left()
+        p2_has_guesses_left = self.p2_atk.has_guesses_left()
 
         # If both sides are out of guesses, compare remaining ship scores
         if not p1_has_guesses_left and not p2_has_guesses_left:
@@ -135,29 +441,228 @@ class Game:
 
 
 class Board:
+    __slots__ = ('name', 'game', 'height', 'width', 'to_place', 'deferred',
+                 'hit_mask', 'taken_mask', 'blocked_mask', 'size_masks',
+                 'legal_counts', 'legal_bits', 'covers',
+                 'typebyID', 'ship_lines', 'unhit_bits', 'ship_index')
+
     def __init__(self, name, game):
         self.name = name          # 'Player' or 'Computer'
         self.game = game          # Reference back to Game
 
+        # Board size, taken from the game
+        self.height = game.height
+        self.width = game.width
+
         # Ships waiting to be placed (sizes)
         self.to_place: list[int] = []
+        # How many times a waiting ship could not be placed yet
+        self.deferred = 0
+
+        # Bitboards (one bit per cell, see src/bitboard.py)
+        self.hit_mask = 0       # Cells that have been hit on this board
+        self.taken_mask = 0     # All cells occupied by ships
+        self.blocked_mask = 0   # Cells guessed and found to be empty (misses)
+
+        # Ship size -> cells where the last ship placed was that size
+        # (what the placement screen shows); replaces a per-cell grid
+        self.size_masks: dict[int, int] = {}
+
+        # Live number of legal placements per fleet ship size. Updated
+        # cell by cell whenever something is placed, missed or sunk, so
+        # is_possible never has to rescan the board.
+        self.legal_counts: dict[int, int] = {}
+        # Small boards also keep which placement_table entries are legal
+        # (bit i set = entry i legal), plus the per-cell list of placements
+        # to recheck (see cover_table)
+        self.legal_bits: dict[int, int] = {}
+        self.covers = {}
+        for size in set(FLEET):
+            if self.cells <= TABLE_MAX_CELLS:
+                table = placement_table(self.height, self.width, size)
+                self.legal_bits[size] = (1 << len(table)) - 1
+                self.legal_counts[size] = len(table)
+            else:
+                self.legal_counts[size] = placement_count(self.height, self.width, size)
+        if self.cells <= TABLE_MAX_CELLS:
+            self.covers = cover_tables(self.height, self.width, tuple(sorted(set(FLEET))))
+
+        # Per-ship tracking. A ship is a straight line, so it is stored as
+        # its first cell index and direction instead of a cell list or a
+        # board-sized mask; on small boards these are all cached small ints.
+        self.typebyID: dict[int, int] = {}      # Ship size per ID
+        self.ship_lines: dict[int, int] = {}    # First cell << 1 | 1 if the ship runs down
+        self.unhit_bits: dict[int, int] = {}    # Bit i set = i-th cell not hit yet
+
+        # Cell index -> ID of the live ship on it, so a hit finds its ship
+        # in one lookup: a flat int array (-1 = water) on small boards,
+        # a dict of just the ship cells on large ones
+        if self.cells <= TABLE_MAX_CELLS:
+            self.ship_index = array('i', [-1]) * self.cells
+        else:
+            self.ship_index = {}
+
+    @property
+    def unhit_coors(self) -> dict[int, list[list[int]]]:
+        """Unhit cells per ship ID (read-only view)."""
+        return {ship_id: [cell for i, cell in enumerate(self.ship_coords(ship_id)) if (bits >> i) & 1]
+                for ship_id, bits in self.unhit_bits.items()}
+
+    @property
+    def hit_coors_byID(self) -> dict[int, list[list[int]]]:
+        """Hit cells per ship ID (read-only view)."""
+        return {ship_id: [cell for i, cell in enumerate(self.ship_coords(ship_id)) if not (bits >> i) & 1]
+                for ship_id, bits in self.unhit_bits.items()}
+
+    @property
+    def remaining(self) -> dict[int, int]:
+        """Unhit cell count per ship ID (read-only view)."""
+        return {ship_id: bits.bit_count() for ship_id, bits in self.unhit_bits.items()}
+
+    def ship_line(self, ship_id) -> tuple[int, int]:
+        """A live ship's first cell index and the index step between its cells."""
+        line = self.ship_lines[ship_id]
+        return line >> 1, self.width if line & 1 else 1
+
+    def ship_coords(self, ship_id) -> list[list[int]]:
+        """Cells of a live ship, in order along the ship."""
+        first, step = self.ship_line(ship_id)
+        return [[(first + i * step) // self.width, (first + i * step) % self.width]
+                for i in range(self.typebyID[ship_id])]
+
+    def ship_at(self, y, x) -> Optional[tuple[int, int]]:
+        """
+        The live ship on (y, x) as (ship ID, position along the ship),
+        or None for open water.
+        """
+        idx = y * self.width + x
+        if self.cells <= TABLE_MAX_CELLS:
+            ship_id = self.ship_index[idx]
+        else:
+            ship_id = self.ship_index.get(idx, -1)
+        if ship_id < 0:
+            return None
+        first, step = self.ship_line(ship_id)
+        return ship_id, (idx - first) // step
+
+    @property
+    def hit_coors(self) -> list[list[int]]:
+        """Coordinates that have been hit on this board (read-only view)."""
+        return mask_to_coords(self.hit_mask, self.width)
+
+    @property
+    def taken_coor(self) -> list[list[int]]:
+        """All coordinates occupied by ships (read-only view)."""
+        return mask_to_coords(self.taken_mask, self.width)
+
+    @property
+    def blocked_coors(self) -> list[list[int]]:
+        """Coordinates guessed and found to be empty (read-only view)."""
+        return mask_to_coords(self.blocked_mask, self.width)
+
+    @property
+    def cells(self) -> int:
+        """Number of cells on this board."""
+        return self.height * self.width
+
+    def cell(self, y, x) -> int:
+        """Size of the last ship placed on (y, x), or 0 for open water."""
+        idx = y * self.width + x
+        for size, mask in self.size_masks.items():
+            if (mask >> idx) & 1:
+                return size
+        return 0
+
+    def is_taken(self, coor) -> bool:
+        """Return True if a ship occupies this cell."""
+        return bool(self.taken_mask & cell_bit(coor[0], coor[1], self.width))
+
+    def is_blocked(self, coor) -> bool:
+        """Return True if this cell was guessed and missed."""
+        return bool(self.blocked_mask & cell_bit(coor[0], coor[1], self.width))
+
+    def is_hit(self, coor) -> bool:
+        """Return True if this cell has been hit."""
+        return bool(self.hit_mask & cell_bit(coor[0], coor[1], self.width))
+
+    def is_free(self, y, x) -> bool:
+        """Return True if a ship could go on (y, x): no ship and no miss there."""
+        return not (self.taken_mask | self.blocked_mask) & cell_bit(y, x, self.width)
+
+    def mark_taken(self, coor):
+        """Record a ship segment on this cell."""
+        bit = cell_bit(coor[0], coor[1], self.width)
+        if not (self.taken_mask | self.blocked_mask) & bit:
+            self.update_legal_counts(coor[0], coor[1], -1)
+        self.taken_mask |= bit
+
+    def clear_taken(self, coor):
+        """Free this cell (used when a ship is sunk)."""
+        bit = cell_bit(coor[0], coor[1], self.width)
+        if self.taken_mask & bit:
+            self.taken_mask &= ~bit
+            if not self.blocked_mask & bit:
+                self.update_legal_counts(coor[0], coor[1], +1)
+
+    def mark_blocked(self, coor):
+        """Record a miss on this cell."""
+        bit = cell_bit(coor[0], coor[1], self.width)
+        if not (self.taken_mask | self.blocked_mask) & bit:
+            self.update_legal_counts(coor[0], coor[1], -1)
+        self.blocked_mask |= bit
+
+    def update_legal_counts(self, y, x, delta):
+        """
+        Adjust legal_counts (and legal_bits) for the placements covering (y, x).
 
-        # Coordinates that have been hit on this board
-        self.hit_coors: list[list[int]] = []
-
-        # All coordinates occupied by ships
-        self.taken_coor: list[list[int]] = []
+        Call with delta=-1 just before the cell becomes occupied, or with
+        delta=+1 just after it is freed. Either way the cell itself is free
+        at call time, so the placements that change are exactly the covering
+        ones with no other occupied cell. Cost depends on ship length only.
+        """
+        if self.covers:
+            occupied = self.taken_mask | self.blocked_mask
+            cell = y * self.width + x
+            for size, covers in self.covers.items():
+                changed = 0
+                for i, mask in covers[cell]:
+                    if not mask & occupied:
+                        changed |= 1 << i
+                self.legal_counts[size] += delta * changed.bit_count()
+                if delta < 0:
+                    self.legal_bits[size] &= ~changed
+                else:
+                    self.legal_bits[size] |= changed
+            return
 
-        # Coordinates that were guessed and found to be empty (misses)
-        self.blocked_coors: list[list[int]] = []
+        # Large boards: only look at the row and column around the cell
+        reach = max(self.legal_counts) - 1
+        row = self.free_line(y, x, reach, vertical=False)
+        col = self.free_line(y, x, reach, vertical=True)
+        for size in self.legal_counts:
+            changed = runs_through(row, reach, size)
+            if size > 1:
+                changed += runs_through(col, reach, size)
+            self.legal_counts[size] += delta * changed
+
+    def free_line(self, y, x, reach, vertical) -> int:
+        """
+        Free cells on the line through (y, x), as a small int.
 
-        # 10x10 grid storing ship sizes or 0 for empty
-        self.board = [[0 for i in range(10)] for i in range(10)]
+        Bit i stands for the cell i - reach steps from (y, x), going right
+        (or down when vertical), and is set if that cell is on the board
+        and is_free. Only the 2 * reach + 1 cells around (y, x) are read.
+        """
+        free = 0
+        for i in range(-reach, reach + 1):
+            cy, cx = (y + i, x) if vertical else (y, x + i)
+            if 0 <= cy < self.height and 0 <= cx < self.width and self.is_free(cy, cx):
+                free |= 1 << (i + reach)
+        return free
 
-        # Per-ship tracking structures
-        self.hit_coors_byID: dict[int, list[list[int]]] = {}  # Hits per ship ID
-        self.typebyID: dict[int, int] = {}                    # Ship size per ID
-        self.unhit_coors: dict[int, list[list[int]]] = {}     # Unhit cells per ship ID
+    def mark_hit(self, coor):
+        """Record a hit on this cell."""
+        self.hit_mask |= cell_bit(coor[0], coor[1], self.width)
 
     def score(self) -> int:
         """
@@ -168,174 +673,341 @@ class Board:
 
     def place_initial_boats(self):
         # Player places ships of size 2,3,4,5 interactively
-        for i in range(2, 6):
+        for i in FLEET:
             PlaceBoat(i, self).position_boat()
     
     def place_boat(self, boat):
         # Place one new boat of given size interactively
         PlaceBoat(boat, self).position_boat()
     
-    def auto_place_ships(self):
-        # Computer auto-places ships of size 2,3,4,5
-        for i in range(2, 6):
-            PlaceBoat(i, self).auto_place()
+    def auto_place_ships(self) -> bool:
+        """
+        Place the whole starting fleet at random in one go (see
+        solver.random_fleet). If no layout of the fleet fits, nothing is
+        placed, the ships are queued in to_place and False is returned.
+        """
+        layout = random_fleet(self.height, self.width, FLEET,
+                              self.taken_mask | self.blocked_mask, self.game.rng)
+        if layout is None:
+            for size in FLEET:
+                self.to_place.append(size)
+                self.game.record("queue", self.name, size)
+            return False
+
+        for size, mask in zip(FLEET, layout):
+            self.add_ship(self.game.new_ship_id(), size, mask_to_coords(mask, self.width))
+        return True
     
     def auto_place(self, boat_size):
-        # Get all legal placements for a ship of this size
-        placements = self.all_legal_placements(boat_size)
+        # Large, mostly empty boards: a few random tries almost always land
+        coords = self.random_free_placement(boat_size)
 
-        # If there are no placements, defer this ship
-        if not placements:
-            self.to_place.append(boat_size)
-            return
+        if coords is None:
+            # Get all legal placements for a ship of this size
+            placements = self.legal_placement_masks(boat_size)
+
+            # If there are no placements, defer this ship
+            if not placements:
+                self.to_place.append(boat_size)
+                self.game.record("queue", self.name, boat_size)
+                return
+
+            # Randomly choose one legal placement
+            coords = mask_to_coords(self.game.rng.choice(placements), self.width)
 
-        # Randomly choose one legal placement
-        coords = choice(placements)
+        # Register a new ship ID and mark its cells
+        self.add_ship(self.game.new_ship_id(), boat_size, coords)
 
-        # Register a new ship ID
-        ship_id = self.game.new_ship_id()
+    def add_ship(self, ship_id, boat_size, coords):
+        """
+        Put a ship on this board: occupancy, per-ship tracking and the
+        legal placement counts.
+        """
+        cells = sorted(y * self.width + x for y, x in coords)
+        runs_down = coords[0][0] != coords[-1][0]
+        # Logged as first cell and direction, so the record stays small on any board
+        self.game.record("place", self.name, ship_id, boat_size,
+                         cells[0] // self.width, cells[0] % self.width, runs_down)
 
-        # Initialize tracking structures for this ship
-        self.unhit_coors[ship_id] = []
         self.typebyID[ship_id] = boat_size
-        self.hit_coors_byID[ship_id] = []
+        self.ship_lines[ship_id] = cells[0] << 1 | runs_down
+        self.unhit_bits[ship_id] = (1 << len(cells)) - 1
+        for cell in cells:
+            self.ship_index[cell] = ship_id
 
-        # Mark cells on the board and in tracking lists
+        self.show_size(cells, boat_size)
         for y, x in coords:
-            self.board[y][x] = boat_size
-            self.taken_coor.append([y, x])
-            self.unhit_coors[ship_id].append([y, x])
+            self.mark_taken([y, x])
+
+    def show_size(self, cells, boat_size):
+        """These cell indices now show a ship of boat_size (see cell)."""
+        ship_mask = 0
+        for cell in cells:
+            ship_mask |= 1 << cell
+        for size in list(self.size_masks):
+            self.size_masks[size] &= ~ship_mask
+            if not self.size_masks[size]:
+                del self.size_masks[size]
+        self.size_masks[boat_size] = self.size_masks.get(boat_size, 0) | ship_mask
+
+    def remove_ship(self, ship_id) -> list[int]:
+        """
+        Take a sunk ship off this board and free its cells.
+
+        Returns:
+            Indices of the cells the ship was on.
+        """
+        first, step = self.ship_line(ship_id)
+        cells = [first + i * step for i in range(self.typebyID[ship_id])]
+        for cell in cells:
+            self.clear_taken([cell // self.width, cell % self.width])
+            if self.cells <= TABLE_MAX_CELLS:
+                self.ship_index[cell] = -1
+            else:
+                del self.ship_index[cell]
+
+        del self.ship_lines[ship_id]
+        del self.unhit_bits[ship_id]
+        del self.typebyID[ship_id]
+        return cells
     
     def has_live_ships(self) -> bool:
         """Return True if this board still has any ship cells unhit."""
-        return len(self.unhit_coors) > 0
+        return len(self.unhit_bits) > 0
     
     def all_legal_placements(self, boat_size: int) -> List[List[List[int]]]:
         """
         Compute all legal placements of a ship of given size, given the current board state.
         Each placement is a list of [y, x] coordinates for that ship.
         """
-        placements: List[List[List[int]]] = []
-        possible_angles = [0, 90, 180, 270]
-
-        for y in range(10):
-            for x in range(10):
-                for angle in possible_angles:
-                    coords: List[List[int]] = []
-
-                    # Build candidate coordinates depending on angle
-                    if angle == 90:      # vertical down
-                        for i in range(boat_size):
-                            coords.append([y + i, x])
-                    elif angle == 180:   # horizontal left
-                        for i in range(boat_size):
-                            coords.append([y, x - i])
-                    elif angle == 270:   # vertical up
-                        for i in range(boat_size):
-                            coords.append([y - i, x])
-                    else:                # 0, horizontal right
-                        for i in range(boat_size):
-                            coords.append([y, x + i])
-
-                    # Validate all coordinates for this placement
-                    legal = True
-                    for cy, cx in coords:
-                        # Must be on the board
-                        if not (0 <= cy < 10 and 0 <= cx < 10):
-                            legal = False
-                            break
-                        # Must not overlap existing ships or blocked cells
-                        if [cy, cx] in self.taken_coor:
-                            legal = False
-                            break
-                        if [cy, cx] in self.blocked_coors:
-                            legal = False
-                            break
-
-                    if legal:
-                        placements.append(coords)
-
-        return placements
+        return [[list(cell) for cell in cells] for _, cells in self.free_placements(boat_size)]
+
+    def legal_placement_masks(self, boat_size: int) -> List[int]:
+        """
+        Same as all_legal_placements, but each placement is returned
+        as a bitmask instead of a coordinate list.
+        """
+        masks = [mask for mask, _ in self.free_placements(boat_size)]
+        if self.game.metrics is not None:
+            self.game.metrics.count("placement_scanned", len(masks))
+        return masks
+
+    def free_placements(self, boat_size: int):
+        """
+        Yield (mask, cells) for each legal placement. Small boards read the
+        live legal_bits (or filter the cached placement table for sizes
+        outside the fleet); large ones scan row by row instead.
+        """
+        if boat_size in self.legal_bits:
+            table = placement_table(self.height, self.width, boat_size)
+            for i in bit_positions(self.legal_bits[boat_size]):
+                yield table[i]
+            return
+
+        occupied = self.taken_mask | self.blocked_mask
+        if self.cells <= TABLE_MAX_CELLS:
+            for mask, cells in placement_table(self.height, self.width, boat_size):
+                if not mask & occupied:
+                    yield mask, cells
+        else:
+            yield from free_placements(occupied, self.height, self.width, boat_size)
+
+    def random_free_placement(self, boat_size: int) -> Optional[list[list[int]]]:
+        """
+        On large boards, try a few random placements and return the first
+        legal one as [y, x] coordinates. Returns None on small boards (the
+        placement table is cheap there) or when every try collided.
+        """
+        if self.cells <= TABLE_MAX_CELLS:
+            return None
+
+        randint = self.game.rng.randint
+        for tries in range(1, RANDOM_TRIES + 1):
+            if randint(0, 1):
+                # Horizontal
+                y = randint(0, self.height - 1)
+                x = randint(0, self.width - boat_size)
+                coords = [[y, x + i] for i in range(boat_size)]
+            else:
+                # Vertical
+                y = randint(0, self.height - boat_size)
+                x = randint(0, self.width - 1)
+                coords = [[y + i, x] for i in range(boat_size)]
+            if all(self.is_free(cy, cx) for cy, cx in coords):
+                break
+        else:
+            coords = None
+
+        if self.game.metrics is not None:
+            self.game.metrics.count("placement_tries", tries)
+        return coords
 
     def is_possible(self, boat_size: int) -> bool:
         """
         Return True if there exists at least one valid placement
         for a ship of this size on the current board.
         """
-        possible_angles = [0, 90, 180, 270]
-        
-        for y in range(10): 
-            for x in range(10):
-                for angle in possible_angles:
-                    boat_coordinates = []
-                    
-                    # Generate candidate coordinates for this angle
-                    if angle == 90:  # down
-                        for i in range(boat_size):
-                            boat_coordinates.append([y + i, x])
-                    elif angle == 180:  # left
-                        for i in range(boat_size):
-                            boat_coordinates.append([y, x - i])
-                    elif angle == 270:  # up
-                        for i in range(boat_size):
-                            boat_coordinates.append([y - i, x])
-                    else:  # 0, right
-                        for i in range(boat_size):
-                            boat_coordinates.append([y, x + i])
-                    
-                    is_valid_placement = True
-                    
-                    # Check bounds and collisions for this placement
-                    for coord in boat_coordinates:
-                        coord_y, coord_x = coord[0], coord[1]
-                        
-                        # On-board check
-                        if coord_y < 0 or coord_y > 9:
-                            is_valid_placement = False
-                            break 
-                        if coord_x < 0 or coord_x > 9:
-                            is_valid_placement = False
-                            break
-                        
-                        # Cannot overlap ships or blocked cells
-                        if coord in self.taken_coor:
-                            is_valid_placement = False
-                            break 
-                        if coord in self.blocked_coors:
-                            is_valid_placement = False
-                            break  
-                    
-                    if is_valid_placement:
-                        return True
-        
-        # No valid placement found anywhere
+        # Fleet sizes: O(1) from the live counts
+        if boat_size in self.legal_counts:
+            return self.legal_counts[boat_size] > 0
+
+        if self.random_free_placement(boat_size) is not None:
+            return True
+
+        # Stops at the first legal placement; False if none exists
+        for _ in self.free_placements(boat_size):
+            return True
         return False
 
 
+class SparseBoard(Board):
+    """
+    Board for boards above TABLE_MAX_CELLS.
+
+    Ship, hit and miss cells are sets of cell indices, and the ship size
+    shown on each cell is a cell -> size dict, so marking a shot or a ship
+    costs the same however large the board is, instead of copying a
+    board-sized int. The *_mask attributes still work (snapshots and the
+    tools read and write them) but are built on each use.
+    """
+    __slots__ = ('hit_cells', 'taken_cells', 'blocked_cells', 'size_cells')
+
+    @property
+    def hit_mask(self) -> int:
+        return cells_to_mask(self.hit_cells, self.cells)
+
+    @hit_mask.setter
+    def hit_mask(self, mask: int):
+        self.hit_cells = set(mask_cells(mask))
+
+    @property
+    def taken_mask(self) -> int:
+        return cells_to_mask(self.taken_cells, self.cells)
+
+    @taken_mask.setter
+    def taken_mask(self, mask: int):
+        self.taken_cells = set(mask_cells(mask))
+
+    @property
+    def blocked_mask(self) -> int:
+        return cells_to_mask(self.blocked_cells, self.cells)
+
+    @blocked_mask.setter
+    def blocked_mask(self, mask: int):
+        self.blocked_cells = set(mask_cells(mask))
+
+    @property
+    def size_masks(self) -> dict[int, int]:
+        by_size: dict[int, list[int]] = {}
+        for cell, size in self.size_cells.items():
+            by_size.setdefault(size, []).append(cell)
+        return {size: cells_to_mask(cells, self.cells) for size, cells in by_size.items()}
+
+    @size_masks.setter
+    def size_masks(self, masks: dict[int, int]):
+        self.size_cells = {cell: size for size, mask in masks.items() for cell in mask_cells(mask)}
+
+    @property
+    def hit_coors(self) -> list[list[int]]:
+        return [[idx // self.width, idx % self.width] for idx in sorted(self.hit_cells)]
+
+    @property
+    def taken_coor(self) -> list[list[int]]:
+        return [[idx // self.width, idx % self.width] for idx in sorted(self.taken_cells)]
+
+    @property
+    def blocked_coors(self) -> list[list[int]]:
+        return [[idx // self.width, idx % self.width] for idx in sorted(self.blocked_cells)]
+
+    def cell(self, y, x) -> int:
+        return self.size_cells.get(y * self.width + x, 0)
+
+    def is_taken(self, coor) -> bool:
+        return coor[0] * self.width + coor[1] in self.taken_cells
+
+    def is_blocked(self, coor) -> bool:
+        return coor[0] * self.width + coor[1] in self.blocked_cells
+
+    def is_hit(self, coor) -> bool:
+        return coor[0] * self.width + coor[1] in self.hit_cells
+
+    def is_free(self, y, x) -> bool:
+        idx = y * self.width + x
+        return idx not in self.taken_cells and idx not in self.blocked_cells
+
+    def mark_taken(self, coor):
+        if self.is_free(coor[0], coor[1]):
+            self.update_legal_counts(coor[0], coor[1], -1)
+        self.taken_cells.add(coor[0] * self.width + coor[1])
+
+    def clear_taken(self, coor):
+        idx = coor[0] * self.width + coor[1]
+        if idx in self.taken_cells:
+            self.taken_cells.discard(idx)
+            if idx not in self.blocked_cells:
+                self.update_legal_counts(coor[0], coor[1], +1)
+
+    def mark_blocked(self, coor):
+        if self.is_free(coor[0], coor[1]):
+            self.update_legal_counts(coor[0], coor[1], -1)
+        self.blocked_cells.add(coor[0] * self.width + coor[1])
+
+    def mark_hit(self, coor):
+        self.hit_cells.add(coor[0] * self.width + coor[1])
+
+    def show_size(self, cells, boat_size):
+        for cell in cells:
+            self.size_cells[cell] = boat_size
+
+
 class Attack:
-    def __init__(self, player, opp):
-        # All guesses made by this attacker (hits and misses)
-        self.guesses: list[list[int]] = []
-        # Missed shots
-        self.misses: list[list[int]] = []
-        # Successful hits (current ship cells)
-        self.hits: list[list[int]] = []
-
-        # Legacy board (not used for rendering anymore, but kept)
-        self.board = [[0 for i in range(10)] for i in range(10)]
-        self.visual_board = [["-" for i in range(10)] for i in range(10)]
+    __slots__ = ('guess_mask', 'guess_count', 'miss_mask', 'hit_mask', 'obj', 'player',
+                 'auto', 'strategy', 'mode', 'cursor', 'shots', 'ships_earned')
+
+    def __init__(self, player, opp, auto=False, strategy="parity"):
+        # Bitboards of this attacker's guesses (hits and misses), missed
+        # shots and successful hits (current ship cells)
+        self.guess_mask = 0
+        self.guess_count = 0
+        self.miss_mask = 0
+        self.hit_mask = 0
 
         # Defender object and owner of this Attack
         self.obj = opp
         self.player = player
 
+        # True when this side is driven by the AI (the computer, or both sides headless)
+        self.auto = auto
+
+        # AI shot selection: "parity" hunting with run targeting, "density" heat map,
+        # or "exact" layout counting in the endgame
+        self.strategy = strategy
+
         # AI mode for the computer: "hunt" random / parity, "target" focused
         self.mode = "hunt"
-        self.target_stack: list[list[int]] = []  # Cells to prioritize in target mode
 
         # Cursor position for interactive targeting
         self.cursor = [0, 0]  # [y, x]
 
+        # Game statistics
+        self.shots = 0          # Every shot fired, including re-guesses
+        self.ships_earned = 0   # Opponent ships sunk and re-earned
+
+    @property
+    def guesses(self) -> list[list[int]]:
+        """All guessed cells (read-only view)."""
+        return mask_to_coords(self.guess_mask, self.obj.width)
+
+    @property
+    def misses(self) -> list[list[int]]:
+        """Missed cells (read-only view)."""
+        return mask_to_coords(self.miss_mask, self.obj.width)
+
+    @property
+    def hits(self) -> list[list[int]]:
+        """Hit cells of ships still afloat (read-only view)."""
+        return mask_to_coords(self.hit_mask, self.obj.width)
+
     def smallest_alive_ship(self) -> int:
         """
         Return size of smallest ship still alive on opponent board.
@@ -345,40 +1017,250 @@ class Attack:
             return 2
         return min(self.obj.typebyID.values())
 
+    def has_guesses_left(self) -> bool:
+        """Return True if at least one cell has not been guessed yet."""
+        return self.guess_count < self.obj.cells
+
+    def is_guessed(self, y, x) -> bool:
+        """Return True if (y, x) has been guessed."""
+        return bool(self.guess_mask & cell_bit(y, x, self.obj.width))
+
+    def is_miss(self, y, x) -> bool:
+        """Return True if a shot at (y, x) missed."""
+        return bool(self.miss_mask & cell_bit(y, x, self.obj.width))
+
+    def is_live_hit(self, y, x) -> bool:
+        """Return True if (y, x) is a hit on a ship still afloat."""
+        return bool(self.hit_mask & cell_bit(y, x, self.obj.width))
+
+    def has_live_hits(self) -> bool:
+        """Return True if some hit ship is still afloat."""
+        return bool(self.hit_mask)
+
+    def live_hit_cells(self) -> set[int]:
+        """Cell indices of the hits on ships still afloat."""
+        return set(bit_positions(self.hit_mask))
+
+    def free_reach(self, idx, step, limit) -> int:
+        """
+        How many cells in a row, starting at cell index `idx` and `step`
+        apart, are not known misses; at most `limit`.
+        """
+        misses = self.miss_mask
+        for i in range(limit):
+            if (misses >> (idx + i * step)) & 1:
+                return i
+        return limit
+
+    def note_shot(self, y, x, hit: bool):
+        """Add (y, x) to the guesses, and to the hits or the misses."""
+        bit = cell_bit(y, x, self.obj.width)
+        if not self.guess_mask & bit:
+            self.guess_count += 1
+        self.guess_mask |= bit
+        if hit:
+            self.hit_mask |= bit
+        else:
+            self.miss_mask |= bit
+
+    def forget(self, cells):
+        """Drop these cell indices (a sunk ship) from the guesses and hits."""
+        ship_mask = 0
+        for cell in cells:
+            ship_mask |= 1 << cell
+        self.guess_count -= (self.guess_mask & ship_mask).bit_count()
+        self.guess_mask &= ~ship_mask
+        self.hit_mask &= ~ship_mask
+
     def pick_hunt_shot(self) -> list[int]:
         """
         Choose a random guess using a parity pattern based on the smallest ship.
         """
         smallest = self.smallest_alive_ship()
-        candidates = []
+        height, width = self.obj.height, self.obj.width
+        rng = self.player.game.rng
+
+        # Large boards: sample parity cells directly instead of listing them all
+        if self.obj.cells > TABLE_MAX_CELLS:
+            for _ in range(RANDOM_TRIES):
+                y = rng.randint(0, height - 1)
+                x = rng.randint(0, width - 1)
+                x -= (y + x) % smallest   # Snap left onto the parity pattern
+                if x >= 0 and not self.is_guessed(y, x):
+                    return [y, x]
 
-        for y in range(10):
-            for x in range(10):
-                if [y, x] in self.guesses:
-                    continue
-                # Generalized parity filter to skip some cells
-                if (y + x) % smallest != 0:
-                    continue
-                candidates.append([y, x])
+        return self.random_hunt_cell(smallest)
+
+    def random_hunt_cell(self, smallest) -> list[int]:
+        """
+        A random unguessed cell on the parity pattern for `smallest`, or
+        any unguessed cell once the pattern is used up.
+        """
+        height, width = self.obj.height, self.obj.width
+        unguessed = full_mask(height, width) & ~self.guess_mask
+
+        # Generalized parity filter to skip some cells
+        candidates = unguessed & parity_mask(height, width, smallest)
 
         # Fallback: if parity leaves no cells, guess any unguessed cell
         if not candidates:
-            for y in range(10):
-                for x in range(10):
-                    if [y, x] not in self.guesses:
-                        candidates.append([y, x])
-        return choice(candidates)
+            candidates = unguessed
+        # The same draw rng.choice makes over the listed cells, without the list
+        idx = nth_bit(candidates, self.player.game.rng.randrange(candidates.bit_count()))
+        return [idx // width, idx % width]
+
+    def pick_density_shot(self) -> list[int]:
+        """
+        Probability-density targeting.
 
-    def add_neighbors(self, coor: list[int]):
+        Counts how many legal placements of each surviving ship cover every
+        unguessed cell and shoots the highest. Placements through known hits
+        get a much larger weight, so this also finishes off damaged ships.
+        Counts are kept bit-sliced (see bitboard.sliced_add), so each
+        placement updates every cell it covers in a few int operations.
+        """
+        height, width = self.obj.height, self.obj.width
+
+        # One counter per cell does not scale; large boards just hunt
+        if self.obj.cells > TABLE_MAX_CELLS:
+            return self.pick_hunt_shot()
+
+        fleet = Counter(self.obj.typebyID.values())
+        best = None
+        # Nothing hit yet: the heat map only depends on the misses, so a
+        # precomputed opening book may already know the answer
+        if not self.hit_mask:
+            book = opening_book(height, width, fleet)
+            if book is not None:
+                best = book.lookup(self.miss_mask)
+        if best is None:
+            best = density_targets(height, width, fleet, self.miss_mask, self.hit_mask, self.guess_mask)
+
+        # No placement covers an open cell: fall back to parity hunting
+        if not best:
+            return self.pick_hunt_shot()
+
+        return self.player.game.rng.choice(mask_to_coords(best, width))
+
+    def pick_exact_shot(self) -> list[int]:
+        """
+        Exact targeting: count every fleet layout that fits the hits and
+        misses so far (see src/solver.py) and shoot the unguessed cell
+        that the most layouts put a ship on. The search is capped in
+        nodes rather than time so seeded games stay reproducible; while
+        it is too big (early on), the density heat map is used instead.
+        """
+        if self.obj.cells > TABLE_MAX_CELLS:
+            return self.pick_density_shot()
+
+        solution = solve_attack(self, max_nodes=EXACT_MAX_NODES, max_bound=EXACT_MAX_BOUND)
+        if solution is None:
+            return self.pick_density_shot()
+
+        best = 0
+        cells: list[int] = []
+        for idx in sorted(solution.weights):
+            weight = solution.weights[idx]
+            if (self.guess_mask >> idx) & 1 or weight < best:
+                continue
+            if weight > best:
+                best = weight
+                cells = []
+            cells.append(idx)
+
+        if not cells:
+            return self.pick_density_shot()
+        idx = self.player.game.rng.choice(cells)
+        return [idx // self.obj.width, idx % self.obj.width]
+
+    def hit_runs(self) -> list[tuple[int, int, int]]:
+        """
+        Every maximal straight run of live hits as (length, first cell,
+        step); step 1 runs across, step width runs down. A lone hit is a
+        run of 1 both ways.
+        """
+        height, width = self.obj.height, self.obj.width
+        hits = self.live_hit_cells()
+        runs = []
+        for idx in sorted(hits):
+            y, x = divmod(idx, width)
+            # Only start counting at the first cell of a run
+            if x == 0 or idx - 1 not in hits:
+                length = 1
+                while x + length < width and idx + length in hits:
+                    length += 1
+                runs.append((length, idx, 1))
+            if y == 0 or idx - width not in hits:
+                length = 1
+                while y + length < height and idx + length * width in hits:
+                    length += 1
+                runs.append((length, idx, width))
+        return runs
+
+    def add_run_ends(self, run: tuple[int, int, int], fleet: Counter, weights: Dict[int, int]):
+        """
+        Weigh the two cells just past the ends of a run of hits: every
+        placement of a surviving ship that covers the whole run and misses
+        no known miss adds its ship count to the end cells it reaches.
+        """
+        length, first, step = run
+        width = self.obj.width
+        # Positions along the run's row or column
+        if step == 1:
+            start, line, base = first % width, width, first - first % width
+        else:
+            start, line, base = first // width, self.obj.height, first % width
+        end = start + length  # One past the last hit
+
+        # Open cells on each side of the run, as far as any ship could
+        # reach; hits in the way are live ship cells, so only misses and
+        # the board edge block it
+        reach = max(fleet, default=0) - length
+        if reach <= 0:
+            return
+        before = base + (start - 1) * step
+        after = base + end * step
+        open_before = self.free_reach(before, -step, min(reach, start))
+        open_after = self.free_reach(after, step, min(reach, line - end))
+
+        for size, count in fleet.items():
+            # A ship no longer than the run would have sunk (or the run is two ships)
+            if size <= length:
+                continue
+            # First positions lo of the placements that cover the run
+            low = max(end - size, start - open_before)
+            high = min(start, end + open_after - size)
+            through_before = min(high, start - 1) - low + 1
+            through_after = high - max(low, end - size + 1) + 1
+            if through_before > 0:
+                weights[before] = weights.get(before, 0) + count * through_before
+            if through_after > 0:
+                weights[after] = weights.get(after, 0) + count * through_after
+
+    def pick_target_shot(self) -> Optional[list[int]]:
         """
-        After a hit, add orthogonal neighbors as higher-priority targets.
+        Finish off hit ships. Runs of hits are extended along their axis,
+        longest runs first, so two hits in a line lock the orientation and
+        the perpendicular cells are only tried when no surviving ship fits
+        along it (e.g. two ships side by side). An end is only shot when a
+        surviving ship can still reach it past misses and the board edge.
+        Returns None when no hit can be extended.
         """
-        y, x = coor
-        for dy, dx in [(-1,0),(1,0),(0,-1),(0,1)]:
-            ny, nx = y + dy, x + dx
-            cand = [ny, nx]
-            if 0 <= ny < 10 and 0 <= nx < 10 and cand not in self.guesses and cand not in self.target_stack:
-                self.target_stack.append(cand)
+        width = self.obj.width
+        fleet = Counter(self.obj.typebyID.values())
+
+        runs = self.hit_runs()
+        for length in sorted({run[0] for run in runs}, reverse=True):
+            weights: Dict[int, int] = {}
+            for run in runs:
+                if run[0] == length:
+                    self.add_run_ends(run, fleet, weights)
+            if weights:
+                best = max(weights.values())
+                cells = sorted(idx for idx, weight in weights.items() if weight == best)
+                idx = self.player.game.rng.choice(cells)
+                return [idx // width, idx % width]
+        return None
 
     def view_own_ships(self, stdscr):
         """
@@ -408,35 +1290,33 @@ class Attack:
 
         start = time.time()
         duration = 5  # seconds to keep view open
+        screen = ScreenRenderer(stdscr, self.player.game.metrics)
 
         while True:
             remaining = max(0, duration - int(time.time() - start))
-            stdscr.clear()
             header = f"{self.player.name}'s ships | {remaining}s left (press 'v' to go back)"
-            stdscr.addstr(0, 0, header)
+            screen.text(0, 0, header)
 
             max_y, max_x = stdscr.getmaxyx()
+            top, left, rows, cols = viewport(self.cursor, self.player.height, self.player.width, max_y, max_x)
 
             # Draw player's board with same styling as placement view
-            for y, row in enumerate(self.player.board):
-                for x, cell in enumerate(row):
-                    draw_y = y + 1
-                    draw_x = x * 4
-                    if draw_y < 0 or draw_y >= max_y:
-                        continue
-                    if draw_x < 0 or draw_x + 1 > max_x:
-                        continue
+            for y in range(top, top + rows):
+                for x in range(left, left + cols):
+                    draw_y = y - top + 1
+                    draw_x = (x - left) * 4
+                    cell = self.player.cell(y, x)
 
                     coord = [y, x]
                     ch = '-'
                     attr = DEFAULT_COLOR
 
                     # Opponent miss on you
-                    if coord in self.player.blocked_coors:
+                    if self.player.is_blocked(coord):
                         ch = 'X'
                         attr = MISS_COLOR
                     # Hit on your ship
-                    elif coord in self.player.hit_coors:
+                    elif self.player.is_hit(coord):
                         ch = str(cell) if cell != 0 else 'H'
                         attr = HIT_COLOR
                     # Your existing ships (unhit)
@@ -448,9 +1328,9 @@ class Attack:
                         ch = '-'
                         attr = DEFAULT_COLOR
 
-                    stdscr.addstr(draw_y, draw_x, ch, attr)
+                    screen.text(draw_y, draw_x, ch, attr)
 
-            stdscr.refresh()
+            screen.flush()
 
             # Allow user to exit early with 'v'
             key = stdscr.getch()
@@ -471,6 +1351,8 @@ class Attack:
 
         - No ships or hit/miss info shown.
         - Only a '*' moving from (0,0) to the target.
+
+        Timing comes from the game's AnimationScheduler; any key skips it.
         """
         curses.start_color()
         curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLACK)   # default
@@ -490,143 +1372,118 @@ class Attack:
                 y += 1
             elif x < tx:
                 x += 1
-            elif x < tx:
-                x += 1
         path.append((ty, tx))
 
-        for step_y, step_x in path:
-            stdscr.clear()
-            stdscr.addstr(0, 0, "Computer is firing...")
+        screen = ScreenRenderer(stdscr, self.player.game.metrics)
+
+        def draw(step):
+            step_y, step_x = step
+            screen.text(0, 0, "Computer is firing...")
 
             max_y, max_x = stdscr.getmaxyx()
+            top, left, rows, cols = viewport((step_y, step_x), self.obj.height, self.obj.width, max_y, max_x)
+            marker_draw_y = step_y - top + 1
+            marker_draw_x = (step_x - left) * 4
+
+            # Blank grid with the projectile marker; only the cells the
+            # marker left and entered actually get redrawn
+            for gy in range(rows):
+                for gx in range(cols):
+                    if gy + 1 == marker_draw_y and gx * 4 == marker_draw_x:
+                        screen.text(gy + 1, gx * 4, '*', MARKER_COLOR)
+                    else:
+                        screen.text(gy + 1, gx * 4, '-', DEFAULT_COLOR)
+
+            screen.flush()
 
-            # Draw a blank 10x10 grid
-            for gy in range(10):
-                for gx in range(10):
-                    draw_y = gy + 1
-                    draw_x = gx * 4
-                    if draw_y < 0 or draw_y >= max_y:
-                        continue
-                    if draw_x < 0 or draw_x + 1 > max_x:
-                        continue
-                    stdscr.addstr(draw_y, draw_x, '-', DEFAULT_COLOR)
-
-            # Draw animated marker for the projectile
-            marker_draw_y = step_y + 1
-            marker_draw_x = step_x * 4
-            if 0 <= marker_draw_y < max_y and 0 <= marker_draw_x < max_x:
-                stdscr.addstr(marker_draw_y, marker_draw_x, '*', MARKER_COLOR)
-
-            stdscr.refresh()
-            time.sleep(0.2)
-
-        # Pause briefly on impact
-        time.sleep(0.8)
+        self.player.game.animator.play(stdscr, path, draw)
 
     def shoot(self, shot):
         """
         Resolve a single shot against the opponent board.
         """
         obj = self.obj
-        self.guesses.append(shot)
+        self.player.game.record("shot", self.player.name, shot[0], shot[1], self.mode)
 
-        if shot in obj.taken_coor:
+        hit = obj.is_taken(shot)
+        self.note_shot(shot[0], shot[1], hit)
+        self.shots += 1
+
+        if hit:
             # Hit a ship
-            self.hits.append(shot)
-            self.onhit(shot)
-            obj.hit_coors.append(shot)
-            self.visual_board[shot[0]][shot[1]] = '!'
+            metrics = self.player.game.metrics
+            if metrics is None:
+                self.onhit(shot)
+            else:
+                start = perf_counter()
+                self.onhit(shot)
+                metrics.observe("onhit", perf_counter() - start)
+            obj.mark_hit(shot)
         else:
-            # Missed; mark blocked on defender and miss for attacker
-            obj.blocked_coors.append(shot)
-            self.misses.append(shot)
-            self.visual_board[shot[0]][shot[1]] = 'X'
+            # Missed; mark blocked on defender (note_shot kept the miss)
+            obj.mark_blocked(shot)
 
     def onhit(self, coor):
         """
         Handle bookkeeping when a shot hits a ship cell:
-        - Update per-ship hit/unhit lists.
+        - Update the ship's unhit cells.
         - Detect when a ship is fully sunk.
         - Award ship to attacker and allow re-placement.
         """
         obj = self.obj
-        boatsbyID = obj.unhit_coors
-        visual_board = self.visual_board
 
         sunk_ids = []
 
-        # Find which ship this coord belongs to and update its lists
-        for ID, cells in boatsbyID.items():
-            if coor in cells:
-                # Record hit once per ship ID
-                if coor not in obj.hit_coors_byID[ID]:
-                    obj.hit_coors_byID[ID].append(coor)
-
-                # Remove all occurrences of this coord from unhit list
-                obj.unhit_coors[ID] = [c for c in obj.unhit_coors[ID] if c != coor]
+        # Look up which ship owns this cell
+        found = obj.ship_at(coor[0], coor[1])
 
-                # Unique coordinates still unhit for this ship
-                remaining_unique = set(tuple(c) for c in obj.unhit_coors[ID])
+        # Record the hit once per cell
+        if found is not None:
+            ID, position = found
+            if (obj.unhit_bits[ID] >> position) & 1:
+                obj.unhit_bits[ID] &= ~(1 << position)
 
                 # If nothing remains, ship is sunk
-                if not remaining_unique:
+                if not obj.unhit_bits[ID]:
                     sunk_ids.append(ID)
-                break  # Coord belongs to only one ship
-
-        # For computer AI: switch to target mode when a hit occurs
-        if self.player.name == "Computer":
-            self.mode = "target"
-            self.add_neighbors(coor)
 
         # Handle all sunk ships
         for ID in sunk_ids:
-            print(f"{self.player.name} sank a size {obj.typebyID[ID]} ship!")
+            self.player.game.log(f"{self.player.name} sank a size {obj.typebyID[ID]} ship!")
+            self.player.game.record("sink", self.player.name, ID, obj.typebyID[ID])
             # Award a ship of same size to attacker for re-placement
             self.player.to_place.append(obj.typebyID[ID])
+            self.ships_earned += 1
 
-            # All coords that belonged to this ship
-            ship_cells = obj.hit_coors_byID[ID].copy()
-
-            for hit in ship_cells:
-                # Clear attacker visual board for re-guessing
-                visual_board[hit[0]][hit[1]] = "-"
-
-                # Remove this coord from defender occupancy
-                obj.taken_coor = [c for c in obj.taken_coor if c != hit]
-
-                # Remove from attacker history so cell can be used again
-                if hit in self.hits:
-                    self.hits.remove(hit)
-                if hit in self.guesses:
-                    self.guesses.remove(hit)
+            # Take the ship off the defender's board; get back its cells
+            ship_cells = obj.remove_ship(ID)
 
-            # Cleanup ship bookkeeping
-            del obj.unhit_coors[ID]
-            del obj.typebyID[ID]
-            del obj.hit_coors_byID[ID]
-
-        # Computer-specific cleanup after all ships of a target are sunk
-        if self.player.name == "Computer":
-            # If no ships remain unhit, reset AI mode and clear stack
-            if not self.obj.unhit_coors:
-                self.mode = "hunt"
-                self.target_stack.clear()
+            # Remove from attacker history so the cells can be used again
+            self.forget(ship_cells)
 
     def pick_target(self):
         """
         Interactive targeting for the human player using curses.
         """
         header = 'Pick a coordinate to attack - (v) to view ships'
+        game = self.player.game
+        new_messages = game.messages[game.messages_shown:]
+        if new_messages:
+            # Messages logged since the last pick, as a status line
+            header += ' | ' + ' | '.join(new_messages)
+            game.messages_shown = len(game.messages)
         while True:
             # Use curses UI to get a coordinate
-            choosen_coor = curses.wrapper(lambda stdscr: self.get_coor(stdscr, header))
+            choosen_coor = self.player.game.run_screen(lambda stdscr: self.get_coor(stdscr, header))
+
+            y, x = choosen_coor
 
             # Never re-guess known misses
-            if choosen_coor in self.misses:
+            if self.is_miss(y, x):
                 continue
 
             # Do not re-guess hits that still correspond to live ship cells
-            if choosen_coor in self.hits and choosen_coor in self.obj.taken_coor:
+            if self.is_live_hit(y, x) and self.obj.is_taken(choosen_coor):
                 continue
 
             # Accept this coordinate
@@ -638,22 +1495,20 @@ class Attack:
         """
         AI targeting logic for the computer.
 
-        - Uses target mode when a ship was recently hit.
+        - Uses target mode while a hit ship is still afloat.
         - Uses hunt mode (parity search) otherwise.
         """
-        # Set mode based on whether we have queued target cells
-        if self.target_stack:
-            self.mode = "target"
-        else:
-            self.mode = "hunt"
-
-        if self.mode == "target":
-            # Depth-first style: pop from end of stack
-            shot = self.target_stack.pop()
-            # If already guessed, fall back to hunt mode
-            if shot in self.guesses:
-                return self.auto_pick_target()
-        else:
+        # The heat map and the solver handle hunting and targeting by themselves
+        if self.strategy in ("density", "exact"):
+            self.mode = "target" if self.has_live_hits() else "hunt"
+            shot = self.pick_exact_shot() if self.strategy == "exact" else self.pick_density_shot()
+            self.shoot(shot)
+            return shot
+
+        # Extend runs of live hits; hunt on the parity pattern when there are none
+        shot = self.pick_target_shot() if self.has_live_hits() else None
+        self.mode = "target" if shot is not None else "hunt"
+        if shot is None:
             shot = self.pick_hunt_shot()
 
         self.shoot(shot)
@@ -684,31 +1539,31 @@ class Attack:
 
         # Start cursor from last used position
         y, x = self.cursor
+        screen = ScreenRenderer(stdscr, self.player.game.metrics)
 
         while True:
-            stdscr.clear()
             if header:
-                stdscr.addstr(0, 0, header)
+                screen.text(0, 0, header)
 
             max_y, max_x = stdscr.getmaxyx()
+            height, width = self.obj.height, self.obj.width
+            top, left, rows, cols = viewport((y, x), height, width, max_y, max_x)
 
-            # Draw 10x10 attack grid
-            for i in range(10):
-                for j in range(10):
-                    draw_y = i + 1
-                    draw_x = j * 4
-                    if draw_y < 0 or draw_y >= max_y:
-                        continue
-                    if draw_x < 0 or draw_x + 1 > max_x:
-                        continue
+            # Draw the visible part of the attack grid
+            for i in range(top, top + rows):
+                for j in range(left, left + cols):
+                    draw_y = i - top + 1
+                    draw_x = (j - left) * 4
 
                     coord = [i, j]
+                    is_miss = self.is_miss(i, j)
+                    is_hit = self.is_live_hit(i, j)
 
                     # Derive symbol from hits/misses
-                    if coord in self.misses:
+                    if is_miss:
                         ch = 'X'
                         attr = MISS
-                    elif coord in self.hits:
+                    elif is_hit:
                         ch = '!'
                         attr = HIT
                     else:
@@ -717,32 +1572,34 @@ class Attack:
 
                     # Cursor highlighting and validity feedback
                     if i == y and j == x:
-                        if coord in self.misses:
+                        if is_miss:
                             # Known miss — red highlight
                             attr = MISS | curses.A_REVERSE
-                        elif coord in self.hits and coord in self.obj.taken_coor:
+                        elif is_hit and self.obj.is_taken(coord):
                             # Hit that is still a live ship cell — cyan highlight
                             attr = HIT | curses.A_REVERSE
                         else:
                             # Either a sunk ship cell or a fresh cell — green highlight
                             attr = VALID | curses.A_REVERSE
 
-                    stdscr.addstr(draw_y, draw_x, ch, attr)
+                    screen.text(draw_y, draw_x, ch, attr)
 
+            screen.flush()
             key = stdscr.getch()
 
             # Move cursor with arrow keys
             if key == curses.KEY_UP:
                 y = max(0, y - 1)
             elif key == curses.KEY_DOWN:
-                y = min(9, y + 1)
+                y = min(self.obj.height - 1, y + 1)
             elif key == curses.KEY_LEFT:
                 x = max(0, x - 1)
             elif key == curses.KEY_RIGHT:
-                x = min(9, x + 1)
+                x = min(self.obj.width - 1, x + 1)
             elif key == ord('v'):
                 # Temporarily view own ships
                 self.view_own_ships(stdscr)
+                screen.invalidate()
                 continue
             elif key == ord('\n'):
                 # Confirm selection on Enter
@@ -750,20 +1607,109 @@ class Attack:
                 return [y, x]
 
 
+class SparseAttack(Attack):
+    """
+    Attack against a SparseBoard: guesses, misses and live hits are sets
+    of cell indices, so a shot costs the same on any board size. The
+    *_mask attributes are built on each use, as on SparseBoard.
+    """
+    __slots__ = ('guess_cells', 'miss_cells', 'hit_cells')
+
+    @property
+    def guess_mask(self) -> int:
+        return cells_to_mask(self.guess_cells, self.obj.cells)
+
+    @guess_mask.setter
+    def guess_mask(self, mask: int):
+        self.guess_cells = set(mask_cells(mask))
+
+    @property
+    def miss_mask(self) -> int:
+        return cells_to_mask(self.miss_cells, self.obj.cells)
+
+    @miss_mask.setter
+    def miss_mask(self, mask: int):
+        self.miss_cells = set(mask_cells(mask))
+
+    @property
+    def hit_mask(self) -> int:
+        return cells_to_mask(self.hit_cells, self.obj.cells)
+
+    @hit_mask.setter
+    def hit_mask(self, mask: int):
+        self.hit_cells = set(mask_cells(mask))
+
+    @property
+    def guesses(self) -> list[list[int]]:
+        return [[idx // self.obj.width, idx % self.obj.width] for idx in sorted(self.guess_cells)]
+
+    @property
+    def misses(self) -> list[list[int]]:
+        return [[idx // self.obj.width, idx % self.obj.width] for idx in sorted(self.miss_cells)]
+
+    @property
+    def hits(self) -> list[list[int]]:
+        return [[idx // self.obj.width, idx % self.obj.width] for idx in sorted(self.hit_cells)]
+
+    def is_guessed(self, y, x) -> bool:
+        return y * self.obj.width + x in self.guess_cells
+
+    def is_miss(self, y, x) -> bool:
+        return y * self.obj.width + x in self.miss_cells
+
+    def is_live_hit(self, y, x) -> bool:
+        return y * self.obj.width + x in self.hit_cells
+
+    def has_live_hits(self) -> bool:
+        return bool(self.hit_cells)
+
+    def live_hit_cells(self) -> set[int]:
+        return self.hit_cells
+
+    def free_reach(self, idx, step, limit) -> int:
+        for i in range(limit):
+            if idx + i * step in self.miss_cells:
+                return i
+        return limit
+
+    def note_shot(self, y, x, hit: bool):
+        idx = y * self.obj.width + x
+        if idx not in self.guess_cells:
+            self.guess_count += 1
+            self.guess_cells.add(idx)
+        if hit:
+            self.hit_cells.add(idx)
+        else:
+            self.miss_cells.add(idx)
+
+    def forget(self, cells):
+        for cell in cells:
+            if cell in self.guess_cells:
+                self.guess_cells.discard(cell)
+                self.guess_count -= 1
+            self.hit_cells.discard(cell)
+
+    def random_hunt_cell(self, smallest) -> list[int]:
+        # Only reached once RANDOM_TRIES random parity cells were all
+        # guessed already, i.e. when the board is nearly used up
+        width = self.obj.width
+        unguessed = [idx for idx in range(self.obj.cells) if idx not in self.guess_cells]
+        candidates = [idx for idx in unguessed if (idx // width + idx % width) % smallest == 0]
+        idx = self.player.game.rng.choice(candidates or unguessed)
+        return [idx // width, idx % width]
+
+
 class PlaceBoat:
+    __slots__ = ('ship', 'obj', 'coor', 'reference_coor', 'angle', 'legal')
+
     def __init__(self, ship: int, obj):
         # List of ship segments (value is ship size)
         self.ship = [ship for i in range(ship)]
         self.obj = obj
 
-        # Snapshot of board when starting placement
-        self.board = deepcopy(obj.board)
-        # Working copy used for rendering the moving ship
-        self.working_board = deepcopy(self.board)
-
         # Start in the middle-ish
-        x = 4
-        y = 4
+        x = obj.width // 2 - 1
+        y = obj.height // 2 - 1
 
         # Dictionary representation of ship coordinates relative to reference
         self.coor = {y + i: x for i in range(ship)}
@@ -792,7 +1738,8 @@ class PlaceBoat:
         """
         Reset ship candidate position to default center column.
         """
-        self.coor = {4 + i: 4 for i in range(self.ship[0])}
+        y, x = self.obj.height // 2 - 1, self.obj.width // 2 - 1
+        self.coor = {y + i: x for i in range(self.ship[0])}
 
     def flatten_coor(self):
         """
@@ -817,23 +1764,14 @@ class PlaceBoat:
         Set self.legal to True if current candidate position is fully on board
         and does not collide with taken or blocked coordinates.
         """
-        array = self.flatten_coor()
-        if max(array) > 9:
-            self.legal = False
-        elif min(array) < 0: 
-            self.legal = False
-        else:
-            self.legal = True
-
-        a2 = self.concatenate_coor()
-        for coor in a2:
-            if coor in self.obj.taken_coor:  
-                self.legal = False
-                return
-            if coor in self.obj.blocked_coors:
+        coords = self.concatenate_coor()
+        for y, x in coords:
+            if not (0 <= y < self.obj.height and 0 <= x < self.obj.width):
                 self.legal = False
                 return
 
+        self.legal = all(self.obj.is_free(y, x) for y, x in coords)
+
     def place_ship(self, ship_id=None):
         """
         Commit the current candidate ship position onto the real board.
@@ -841,61 +1779,44 @@ class PlaceBoat:
         if ship_id is None:
             ship_id = self.obj.game.new_ship_id()
         
-        ship_coords = []
-
         # Copy coordinates into board and tracking structures
-        for y, x in self.concatenate_coor():
-            self.obj.board[y][x] = self.ship[0]
-            self.obj.taken_coor.append([y, x])
-            ship_coords.append([y, x])
-
-        self.obj.unhit_coors[ship_id] = ship_coords.copy()
-        self.obj.typebyID[ship_id] = self.ship[0]
-        self.obj.hit_coors_byID[ship_id] = []
+        self.obj.add_ship(ship_id, self.ship[0], self.concatenate_coor())
     
-    def auto_place(self):
+    def auto_place(self) -> bool:
         """
-        Automatically place this ship in a random legal position.
+        Place this ship at a random legal position, the same way
+        Board.auto_place picks one, so the work is bounded. Returns False,
+        and leaves the board alone, if the ship fits nowhere.
         """
-        while True:
-            # Randomly choose a reference coordinate
-            self.reference_coor = (randint(0,9), randint(0, 9))
-            self.update_ship()
-            self.valid_position()
-            if self.legal:
-                self.place_ship()
-                return
+        coords = self.obj.random_free_placement(self.ship[0])
+        if coords is None:
+            masks = self.obj.legal_placement_masks(self.ship[0])
+            if not masks:
+                return False
+            coords = mask_to_coords(self.obj.game.rng.choice(masks), self.obj.width)
+
+        # Cells come back top-left first, which is the reference cell for
+        # a ship pointing right (0) or down (90)
+        self.reference_coor = tuple(coords[0])
+        self.angle = 0 if coords[0][0] == coords[-1][0] and len(coords) > 1 else 90
+        self.update_ship()
+        self.legal = True
+        self.place_ship()
+        return True
 
     def check_offscreen(self):
         """
         Check if any part of candidate ship is off the board.
         """
         for key in self.coor.keys():
-            if key < 0 or key > 9:
+            if key < 0 or key > self.obj.height - 1:
                 return True
         for value in self.coor.values():
             lo, hi = (value, value) if isinstance(value, int) else (min(value), max(value))
-            if lo < 0 or hi > 9:
+            if lo < 0 or hi > self.obj.width - 1:
                 return True
 
         return False
-
-    def update_board(self):
-        """
-        Refresh working_board with the candidate ship overlaid on top.
-        """
-        self.working_board = deepcopy(self.board)
-        for Ys in self.coor.keys():
-            Ys = [Ys] if isinstance(Ys, int) else Ys
-            for y in Ys:
-                if 0 > y or y > 9:
-                    continue
-                for Xs in self.coor.values():
-                    Xs = [Xs] if isinstance(Xs, int) else Xs
-                    for x in list(Xs):
-                        if 0 > x or x > 9:
-                            continue
-                        self.working_board[y][x] = self.ship[0]
     
     def concatenate_coor(self):
         """
@@ -903,13 +1824,14 @@ class PlaceBoat:
         """
         coor = self.coor
         output = []
-        for Ys in coor.keys():
+        # Pair each row with its own column(s); vertical ships have one
+        # key per row, horizontal ships one key holding every column
+        for Ys, Xs in coor.items():
             Ys = [Ys] if isinstance(Ys, int) else Ys
+            Xs = [Xs] if isinstance(Xs, int) else Xs
             for y in Ys:
-                for Xs in coor.values():
-                    Xs = [Xs] if isinstance(Xs, int) else Xs
-                    for x in Xs:
-                        output.append([y, x])
+                for x in Xs:
+                    output.append([y, x])
         return output
 
     def position_boat(self):
@@ -920,7 +1842,7 @@ class PlaceBoat:
             None (ship is placed directly onto the board when confirmed).
         """
         header = 'Place the boat (R to rotate):\n\n'
-        return curses.wrapper(lambda stdscr: self.get_position(stdscr, header))
+        return self.obj.game.run_screen(lambda stdscr: self.get_position(stdscr, header))
 
     def get_position(self, stdscr, header):
         """
@@ -941,47 +1863,43 @@ class PlaceBoat:
         curses.noecho()
         curses.cbreak()
         stdscr.keypad(True)  # Enable arrow keys
+        screen = ScreenRenderer(stdscr, self.obj.game.metrics)
 
         while True:
-            stdscr.clear()
             if header:
-                stdscr.addstr(0, 0, header)
+                screen.text(0, 0, header)
 
             # Validate and update candidate position
             self.valid_position()
             self.check_offscreen()
-            self.update_board()
 
             Ccoor = self.concatenate_coor()
             max_y, max_x = stdscr.getmaxyx()  # Terminal bounds
+            top, left, rows, cols = viewport(self.reference_coor, self.obj.height, self.obj.width, max_y, max_x)
 
-            for y, row in enumerate(self.working_board):
-                for x, cell in enumerate(row):
-                    draw_y = y + 1
-                    draw_x = x * 4
-
-                    if draw_y < 0 or draw_y >= max_y:
-                        continue
-                    if draw_x < 0 or draw_x + 1 > max_x:
-                        continue
+            for y in range(top, top + rows):
+                for x in range(left, left + cols):
+                    draw_y = y - top + 1
+                    draw_x = (x - left) * 4
+                    cell = self.obj.cell(y, x)
 
                     coord = [y, x]
                     ch = '-'
                     attr = DEFAULT_COLOR
 
                     # Opponent miss on you
-                    if coord in self.obj.blocked_coors:
+                    if self.obj.is_blocked(coord):
                         ch = 'X'
                         attr = MISS_COLOR
 
                     # Hit on your ship
-                    elif coord in self.obj.hit_coors:
-                        ch = str(self.board[y][x]) if self.board[y][x] != 0 else 'H'
+                    elif self.obj.is_hit(coord):
+                        ch = str(cell) if cell != 0 else 'H'
                         attr = HIT_COLOR
 
                     # Existing ships (unhit)
-                    elif self.board[y][x] != 0:
-                        ch = str(self.board[y][x])
+                    elif cell != 0:
+                        ch = str(cell)
                         attr = SHIP_COLOR
 
                     # Empty cell
@@ -993,8 +1911,9 @@ class PlaceBoat:
                     if coord in Ccoor:
                         attr = SHIP_COLOR if self.legal else HIT_COLOR
 
-                    stdscr.addstr(draw_y, draw_x, ch, attr)
+                    screen.text(draw_y, draw_x, ch, attr)
 
+            screen.flush()
             key = stdscr.getch()
             y, x = self.reference_coor
 
@@ -1002,11 +1921,11 @@ class PlaceBoat:
             if key == curses.KEY_UP:
                 y = max(0, y - 1)
             elif key == curses.KEY_DOWN:
-                y = min(len(self.board) - 1, y + 1)
+                y = min(self.obj.height - 1, y + 1)
             elif key == curses.KEY_LEFT:
                 x = max(0, x - 1)
             elif key == curses.KEY_RIGHT:
-                x = min(len(self.board[y]) - 1, x + 1)
+                x = min(self.obj.width - 1, x + 1)
             elif key == ord('r'):
                 # Rotate 90 degrees clockwise
                 self.angle = (self.angle + 90) % 360
@@ -1018,7 +1937,6 @@ class PlaceBoat:
             # Update reference and recompute candidate ship
             self.reference_coor = (y, x)
             self.update_ship()
-            self.update_board()
 
 
 def main():
@@ -0,0 +1,248 @@
+"""
+bench.py
+
+Benchmarks for the engine's hot paths.
+
+Each case builds a headless game at a given board size and fill level
+(the fraction of cells already shot as misses), then times one engine
+call. Results are written as JSON and can be compared against a stored
+baseline so slowdowns are caught before they ship.
+
+Usage:
+    python -m src.bench --out bench.json
+    python -m src.bench --save-baseline baseline.json
+    python -m src.bench --baseline baseline.json --threshold 0.25
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.battleship import Game, PlaceBoat
+
+# Board sizes and fill levels every case runs at
+SIZES = (10, 32, 100)
+FILLS = (0.0, 0.3, 0.6)
+
+# Timed seconds per case, iteration cap, and a wall-clock cap (in budgets)
+# so cases with expensive setups still finish
+CASE_BUDGET = 0.2
+MAX_ITERATIONS = 2000
+MIN_ITERATIONS = 5
+WALL_BUDGETS = 10
+
+# Layouts a setup tries before it gives up on a crowded board
+SETUP_TRIES = 20
+
+
+def make_game(size: int, fill: float, seed: int) -> Game:
+    """
+    Build a headless game where the computer has already missed on
+    `fill` of the player's open cells.
+    """
+    rng = random.Random(seed)
+    game = Game(headless=True, height=size, width=size, rng=rng)
+
+    board = game.p1
+    empty = [[y, x] for y in range(size) for x in range(size) if not board.is_taken([y, x])]
+    rng.shuffle(empty)
+    for cell in empty[:int(fill * size * size)]:
+        game.p2_atk.shoot(cell)
+    return game
+
+
+def measure(setup: Callable[[int], object], call: Callable[[object], object],
+            budget: float = CASE_BUDGET) -> Optional[Dict[str, float]]:
+    """
+    Time `call(state)` on fresh states from `setup(i)`; setup time is not counted.
+    Returns per-call stats in microseconds, or None if setup gave no state.
+    """
+    # One untimed warm-up call (fills caches such as the placement tables)
+    state = setup(-1)
+    if state is None:
+        return None
+    call(state)
+
+    samples: List[float] = []
+    spent = 0.0
+    i = 0
+    deadline = time.perf_counter() + budget * WALL_BUDGETS
+    gc.disable()  # Keep collector pauses out of the samples
+    try:
+        while i < MIN_ITERATIONS or (spent < budget and i < MAX_ITERATIONS
+                                     and time.perf_counter() < deadline):
+            state = setup(i)
+            if state is None:
+                return None
+            start = time.perf_counter()
+            call(state)
+            elapsed = time.perf_counter() - start
+            samples.append(elapsed)
+            spent += elapsed
+            i += 1
+    finally:
+        gc.enable()
+
+    samples.sort()
+    return {
+        'n': len(samples),
+        'mean_us': sum(samples) / len(samples) * 1e6,
+        'median_us': samples[len(samples) // 2] * 1e6,
+        'min_us': samples[0] * 1e6,
+    }
+
+
+def live_ship(board) -> Optional[Tuple[int, list]]:
+    """Any ship on the board with at least two unhit cells."""
+    for ship_id, cells in board.unhit_coors.items():
+        if len(cells) >= 2:
+            return ship_id, cells
+    return None
+
+
+def board_cases(size: int, fill: float) -> Dict[str, Tuple[Callable, Callable]]:
+    """(setup, call) pairs for one board size and fill level."""
+    cache: Dict[int, Game] = {}
+
+    def shared(i):
+        # Read-only cases reuse a single game
+        if 0 not in cache:
+            cache[0] = make_game(size, fill, seed=size)
+        return cache[0]
+
+    def fresh(i):
+        return make_game(size, fill, seed=size * 1000 + i)
+
+    def hit_setup(i):
+        game = fresh(i)
+        ship = live_ship(game.p1)
+        return None if ship is None else (game, ship[1][0])
+
+    def sink_setup(i):
+        game = fresh(i)
+        ship = live_ship(game.p1)
+        if ship is None:
+            return None
+        cells = list(ship[1])
+        for cell in cells[:-1]:
+            game.p2_atk.shoot(cell)
+        return game, cells[-1]
+
+    def place_setup(i):
+        # Crowded boards sometimes leave no room for the ship; move on to
+        # the next layout instead of dropping the whole case
+        for attempt in range(SETUP_TRIES):
+            game = fresh(i * SETUP_TRIES + attempt)
+            if game.p1.is_possible(3):
+                return game
+        return None
+
+    return {
+        'all_legal_placements': (shared, lambda g: g.p1.all_legal_placements(3)),
+        'is_possible': (shared, lambda g: g.p1.is_possible(5)),
+        'pick_hunt_shot': (shared, lambda g: g.p2_atk.pick_hunt_shot()),
+        'get_winner': (shared, lambda g: g.get_winner()),
+        'onhit_hit': (hit_setup, lambda s: s[0].p2_atk.onhit(s[1])),
+        'onhit_sink': (sink_setup, lambda s: s[0].p2_atk.onhit(s[1])),
+        'placeboat_auto_place': (place_setup, lambda g: PlaceBoat(3, g.p1).auto_place()),
+    }
+
+
+def full_game_cases() -> Dict[str, Tuple[Callable, Callable]]:
+    """Complete headless games, one per strategy."""
+    def setup(strategy):
+        def make(i):
+            return Game(headless=True, p1_strategy=strategy, p2_strategy="parity",
+                        rng=random.Random(i))
+        return make
+
+    return {
+        f'headless_game[{strategy}]': (setup(strategy), lambda g: g.run_headless())
+        for strategy in ("parity", "density")
+    }
+
+
+def run_benchmarks(sizes=SIZES, fills=FILLS, budget: float = CASE_BUDGET) -> Dict[str, object]:
+    """Run every case and return the JSON-ready report."""
+    results: Dict[str, object] = {}
+
+    for size in sizes:
+        for fill in fills:
+            for name, (setup, call) in board_cases(size, fill).items():
+                stats = measure(setup, call, budget)
+                if stats is None:
+                    stats = {'skipped': f"no board at fill={fill} has what the case needs"}
+                results[f'{name}[{size}x{size},fill={fill}]'] = stats
+
+    for name, (setup, call) in full_game_cases().items():
+        results[name] = measure(setup, call, budget * 5)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object],
+            threshold: float) -> List[str]:
+    """
+    Names of cases whose median got slower than the baseline by more
+    than `threshold` (0.25 = 25%).
+    """
+    regressions = []
+    for name, current in report['results'].items():
+        before = baseline['results'].get(name)
+        if not current or not before or 'skipped' in current or 'skipped' in before:
+            continue
+        ratio = current['median_us'] / before['median_us']
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {before['median_us']:.1f}us -> {current['median_us']:.1f}us ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the battleship engine.")
+    parser.add_argument('--out', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="compare against this stored report")
+    parser.add_argument('--save-baseline', help="also store the report as a new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument('--quick', action='store_true', help="10x10 only, shorter budget")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        report = run_benchmarks(sizes=(10,), budget=CASE_BUDGET / 4)
+    else:
+        report = run_benchmarks()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+bitboard.py
+
+Helpers for storing sets of board cells as a single integer.
+
+Cell (y, x) on a board of the given width is bit number y * width + x.
+A set of cells is the OR of their bits, so membership and overlap
+checks become one bitwise AND instead of a list scan.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Boards with more cells than this skip the cached placement tables
+# (a 1000x1000 board would need millions of megabyte-sized masks) and
+# generate placements on the fly instead.
+TABLE_MAX_CELLS = 32 * 32
+
+# Board shapes whose tables stay cached. A shape near TABLE_MAX_CELLS
+# holds a few MB of tables, so a process that sees many shapes (the
+# server lets clients pick any) keeps only the most recent ones and
+# rebuilds the others when they come back.
+TABLE_CACHE_SHAPES = 8
+# Per-size tables: one entry per fleet ship size (or parity modulus)
+SIZE_CACHE_ENTRIES = TABLE_CACHE_SHAPES * 4
+
+# One machine word of bits, for nth_bit
+WORD_MASK = (1 << 64) - 1
+
+
+def cell_bit(y: int, x: int, width: int) -> int:
+    """Return a mask with only cell (y, x) set."""
+    return 1 << (y * width + x)
+
+
+def coords_to_mask(coords: Iterable[List[int]], width: int) -> int:
+    """Combine a list of [y, x] coordinates into one mask."""
+    mask = 0
+    for y, x in coords:
+        mask |= 1 << (y * width + x)
+    return mask
+
+
+def mask_to_coords(mask: int, width: int) -> List[List[int]]:
+    """
+    Expand a mask back into a list of [y, x] coordinates,
+    ordered by cell index (row by row, left to right).
+    """
+    return [[idx // width, idx % width] for idx in bit_positions(mask)]
+
+
+def bit_positions(mask: int) -> Iterator[int]:
+    """Yield the index of every set bit, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def nth_bit(mask: int, n: int) -> int:
+    """
+    Index of set bit number n of `mask`, counting from the lowest (0).
+    Skips 64 bits at a time by their bit_count, so picking a random cell
+    of a mask does not have to list every cell first.
+    """
+    base = 0
+    word = mask & WORD_MASK
+    count = word.bit_count()
+    while n >= count:
+        n -= count
+        mask >>= 64
+        base += 64
+        word = mask & WORD_MASK
+        count = word.bit_count()
+    for _ in range(n):
+        word &= word - 1
+    return base + (word & -word).bit_length() - 1
+
+
+def mask_cells(mask: int) -> List[int]:
+    """
+    Index of every set bit, lowest first, like bit_positions. Reads the
+    mask as bytes and skips the zero ones, so a huge mask with many bits
+    set costs one pass instead of one big-int operation per bit.
+    """
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    cells = []
+    for found in re.finditer(rb'[^\x00]', data):
+        byte = data[found.start()]
+        base = found.start() * 8
+        for i in range(8):
+            if (byte >> i) & 1:
+                cells.append(base + i)
+    return cells
+
+
+def cells_to_mask(cells: Iterable[int], size: int) -> int:
+    """Mask with the given cell indices set, on a board of `size` cells."""
+    data = bytearray((size + 7) // 8)
+    for cell in cells:
+        data[cell >> 3] |= 1 << (cell & 7)
+    return int.from_bytes(data, 'little')
+
+
+@lru_cache(maxsize=SIZE_CACHE_ENTRIES)
+def placement_table(height: int, width: int, ship_size: int) -> Tuple[Tuple[int, Tuple[Tuple[int, int], ...]], ...]:
+    """
+    Every on-board placement of a ship as (mask, cells), built once per
+    (board size, ship size) and cached.
+
+    Each placement is listed once, anchored at its top-left cell, so the
+    0/180 and 90/270 duplicates that the angle loops produce are gone.
+    A single-cell ship is only listed once.
+    """
+    table = []
+    for y in range(height):
+        for x in range(width):
+            # Horizontal (angle 0 / 180)
+            if x + ship_size <= width:
+                cells = tuple((y, x + i) for i in range(ship_size))
+                table.append((coords_to_mask(cells, width), cells))
+            # Vertical (angle 90 / 270)
+            if ship_size > 1 and y + ship_size <= height:
+                cells = tuple((y + i, x) for i in range(ship_size))
+                table.append((coords_to_mask(cells, width), cells))
+    return tuple(table)
+
+
+def free_placements(occupied: int, height: int, width: int,
+                    ship_size: int) -> Iterator[Tuple[int, Tuple[Tuple[int, int], ...]]]:
+    """
+    Yield (mask, cells) for every placement that avoids `occupied`.
+
+    Scans one row at a time: a horizontal ship needs `ship_size` free bits
+    in a row, a vertical one needs the same bit free in `ship_size` rows.
+    This is the fallback for boards too large for placement_table, and it
+    stops as soon as the caller has what it needs.
+    """
+    row_mask = (1 << width) - 1
+    free_rows = []
+    rest = occupied
+    for _ in range(height):
+        free_rows.append(~rest & row_mask)
+        rest >>= width
+
+    for y in range(height):
+        base = y * width
+
+        # Horizontal: shift-AND leaves a bit where a long enough run starts
+        starts = free_rows[y]
+        for i in range(1, ship_size):
+            starts &= free_rows[y] >> i
+        for x in bit_positions(starts):
+            cells = tuple((y, x + i) for i in range(ship_size))
+            yield (((1 << ship_size) - 1) << (base + x), cells)
+
+        # Vertical: the same column must be free in every row of the ship
+        if ship_size > 1 and y + ship_size <= height:
+            starts = free_rows[y]
+            for i in range(1, ship_size):
+                starts &= free_rows[y + i]
+            for x in bit_positions(starts):
+                cells = tuple((y + i, x) for i in range(ship_size))
+                yield (coords_to_mask(cells, width), cells)
+
+
+def full_mask(height: int, width: int) -> int:
+    """Mask with every cell of the board set."""
+    return (1 << (height * width)) - 1
+
+
+@lru_cache(maxsize=SIZE_CACHE_ENTRIES)
+def parity_mask(height: int, width: int, modulus: int) -> int:
+    """
+    Mask of the cells used by the hunt parity pattern,
+    i.e. every (y, x) with (y + x) % modulus == 0.
+    """
+    mask = 0
+    for y in range(height):
+        for x in range(width):
+            if (y + x) % modulus == 0:
+                mask |= 1 << (y * width + x)
+    return mask
+
+
+def sliced_add(counters: List[int], mask: int, weight: int = 1):
+    """
+    Add `weight` to every cell of `mask` in a bit-sliced counter.
+
+    counters[i] holds bit i of every cell's count, so one call updates all
+    cells of the mask at once with a few big-int operations (a ripple-carry
+    adder working on every cell in parallel).
+    """
+    level = 0
+    while weight:
+        if weight & 1:
+            carry = mask
+            i = level
+            while carry:
+                while i >= len(counters):
+                    counters.append(0)
+                overflow = counters[i] & carry
+                counters[i] ^= carry
+                carry = overflow
+                i += 1
+        weight >>= 1
+        level += 1
+
+
+def sliced_argmax(counters: List[int], candidates: int) -> int:
+    """
+    Return the mask of candidate cells whose bit-sliced count is highest.
+    Walks from the top bit down, keeping only cells that have each bit set.
+    """
+    best = candidates
+    for level in reversed(counters):
+        if best & level:
+            best &= level
+    return best
+
+
+def placement_count(height: int, width: int, ship_size: int) -> int:
+    """Number of on-board placements of a ship on an empty board."""
+    horizontal = height * max(0, width - ship_size + 1)
+    if ship_size == 1:
+        return horizontal
+    return horizontal + width * max(0, height - ship_size + 1)
+
+
+@lru_cache(maxsize=SIZE_CACHE_ENTRIES)
+def cover_table(height: int, width: int, ship_size: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """
+    For every cell index, the placements that cover that cell as
+    (position in placement_table, mask) pairs.
+    """
+    covers: List[List[Tuple[int, int]]] = [[] for _ in range(height * width)]
+    for i, (mask, cells) in enumerate(placement_table(height, width, ship_size)):
+        for y, x in cells:
+            covers[y * width + x].append((i, mask))
+    return tuple(tuple(c) for c in covers)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SHAPES)
+def cover_tables(height: int, width: int, sizes: Tuple[int, ...]) -> Dict[int, tuple]:
+    """
+    cover_table for each ship size, in one dict shared by every board of
+    this shape. Treat it as read-only.
+    """
+    return {size: cover_table(height, width, size) for size in sizes}
+
+
+def runs_through(free: int, reach: int, ship_size: int) -> int:
+    """
+    Count the free runs of length ship_size that include bit `reach` of
+    `free`, where bit i is the cell i - reach steps along a line (see
+    Board.free_line).
+    """
+    run = (1 << ship_size) - 1
+    count = 0
+    for start in range(max(0, reach - ship_size + 1), reach + 1):
+        if (free >> start) & run == run:
+            count += 1
+    return count
@@ -0,0 +1,184 @@
+"""
+events.py
+
+Append-only event log for a game, and a replay engine that rebuilds the
+game state at any turn from it.
+
+A game created with Game(events=EventLog()) records every state change
+as a tuple whose first item is the event kind:
+
+    ("game", height, width, headless, p1_strategy, p2_strategy)
+    ("start", p1_moves_first)               turn order was drawn
+    ("turn", n)                             move number n begins
+    ("place", side, ship_id, size, y, x, down)
+                                            ship put on a board, (y, x) its
+                                            top-left cell, down if vertical
+    ("shot", side, y, x, mode)              side fired at (y, x) in AI mode
+    ("sink", side, ship_id, size)           side sank a ship and earned it
+    ("defer", side, size)                   earned ship re-queued, no room
+    ("queue", side, size)                   auto_place found no room
+
+`side` is the board name ('Player' or 'Computer').
+
+Replaying applies these directly to the boards: shots go through
+Attack.shoot, so sinks and awards follow on their own, but no AI decision
+is ever recomputed. Replayer keeps snapshots (src/snapshot.py) every few
+turns so jumping around a long game only replays the last stretch.
+
+Usage:
+    log = EventLog("game.jsonl")
+    game = Game(headless=True, events=log)
+    game.run_headless()
+    log.close()
+
+    replay = Replayer(EventLog.load("game.jsonl"))
+    game_at_40 = replay.state_at(40)
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.battleship import Game
+from src.snapshot import dumps, loads
+
+# Turns between the snapshots Replayer keeps
+CHECKPOINT_EVERY = 50
+
+
+class EventLog:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Events are kept in memory; with a path they are also appended to
+        that file as JSON lines as they happen.
+        """
+        self.events: List[tuple] = []
+        self.file = open(path, 'a') if path else None
+
+    def append(self, event: tuple):
+        self.events.append(event)
+        if self.file is not None:
+            self.file.write(json.dumps(event) + '\n')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+    @classmethod
+    def load(cls, path: str) -> "EventLog":
+        """Read a log written by EventLog(path)."""
+        log = cls()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    log.events.append(tuple(json.loads(line)))
+        return log
+
+
+def new_game(event: tuple) -> Game:
+    """Empty game matching a "game" event."""
+    _, height, width, headless, p1_strategy, p2_strategy = event
+    return Game(headless=headless, p1_strategy=p1_strategy, p2_strategy=p2_strategy,
+                height=height, width=width, animation_speed=0, place_ships=False)
+
+
+def apply(game: Game, event: tuple):
+    """Apply one recorded event to `game`."""
+    kind = event[0]
+
+    if kind == "start":
+        game.p1_first = bool(event[1])
+        game.started = True
+
+    elif kind == "turn":
+        game.turns = event[1]
+
+    elif kind == "place":
+        _, side, ship_id, size, y, x, down = event
+        board = board_for(game, side)
+        coords = [[y + i, x] if down else [y, x + i] for i in range(size)]
+        board.add_ship(ship_id, size, coords)
+        game.ship_id_counter = max(game.ship_id_counter, ship_id + 1)
+
+    elif kind == "shot":
+        _, side, y, x, mode = event
+        atk = game.p1_atk if side == game.p1.name else game.p2_atk
+        shot = [y, x]
+
+        # Restore what auto_pick_target / pick_target set before shooting
+        atk.mode = mode
+        if not atk.auto:
+            atk.cursor = shot
+
+        atk.shoot(shot)
+        # The move then takes every earned ship off the queue to place it;
+        # the ones that do not fit come back as "defer" events
+        atk.player.to_place.clear()
+
+    elif kind == "defer":
+        board = board_for(game, event[1])
+        board.to_place.append(event[2])
+        board.deferred += 1
+
+    elif kind == "queue":
+        board_for(game, event[1]).to_place.append(event[2])
+
+    # "game" starts a replay and "sink" follows from the shot; nothing to do
+
+
+def board_for(game: Game, side: str):
+    return game.p1 if side == game.p1.name else game.p2
+
+
+class Replayer:
+    def __init__(self, events: Iterable[tuple], checkpoint_every: int = CHECKPOINT_EVERY):
+        self.events = list(events)
+        if not self.events or self.events[0][0] != "game":
+            raise ValueError("event log does not start with a game event")
+        self.checkpoint_every = checkpoint_every
+
+        # Position of each "turn" event, by turn number
+        self.turn_index: Dict[int, int] = {
+            event[1]: i for i, event in enumerate(self.events) if event[0] == "turn"
+        }
+        # Snapshots taken so far: turn -> (blob, index of that turn's event)
+        self.checkpoints: Dict[int, Tuple[bytes, int]] = {}
+
+    @property
+    def turns(self) -> int:
+        """Number of moves in the log."""
+        return len(self.turn_index)
+
+    def state_at(self, turn: Optional[int] = None) -> Game:
+        """
+        The game as it was just before move `turn` (so turn 0 is after the
+        initial placements), or at the end of the log if turn is None.
+        """
+        stop = len(self.events) if turn is None else self.turn_index.get(turn)
+        if stop is None:
+            raise ValueError(f"turn {turn} is not in the log (0-{self.turns - 1})")
+
+        # Start from the latest snapshot at or before the wanted turn
+        done = sorted(t for t, (_, i) in self.checkpoints.items() if i <= stop)
+        if done:
+            blob, start = self.checkpoints[done[-1]]
+            game = loads(blob)
+        else:
+            game = new_game(self.events[0])
+            start = 1
+
+        for i in range(start, stop):
+            event = self.events[i]
+            if event[0] == "turn" and event[1] % self.checkpoint_every == 0 \
+                    and event[1] not in self.checkpoints:
+                self.checkpoints[event[1]] = (dumps(game), i)
+            apply(game, event)
+
+        game.turns = self.turns if turn is None else turn
+        return game
@@ -0,0 +1,80 @@
+"""
+memory.py
+
+Measure how much memory a live game holds.
+
+Games are created (and optionally played for a number of turns) while
+tracemalloc counts the bytes they allocate. Tables shared between games
+(placement and cover tables, parity masks) are built by a warm-up game
+first, so the result is the cost of one more game on a busy host.
+
+For scale, on a 10x10 board: the original list-of-lists Game held about
+33.8 KB once both fleets were placed. This one holds about 8.6 KB at
+turn 0 and 9.7 KB at turn 60, a 3.9x cut rather than 10x. About 2.5 KB
+of it is the game's own random.Random, which keeps seeded games
+reproducible; the rest is the slotted objects, their small dicts and
+the flat cell-to-ship arrays.
+
+Usage:
+    python -m src.memory --games 1000 --turns 60
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from typing import Dict, List
+
+from src.battleship import Game
+
+
+def build_games(count: int, turns: int, size: int, seed: int) -> List[Game]:
+    """`count` headless games, each played for up to `turns` moves."""
+    games = []
+    for i in range(count):
+        game = Game(headless=True, height=size, width=size, rng=random.Random(seed + i))
+        game.start()
+        while game.turns < turns and game.get_winner() is None:
+            game.play_turn()
+        games.append(game)
+    return games
+
+
+def bytes_per_game(count: int = 1000, turns: int = 0, size: int = 10, seed: int = 0) -> float:
+    """Average bytes still allocated per live game after building `count` games."""
+    # Warm-up: fill the shared caches outside the measurement
+    build_games(1, turns, size, seed)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        games = build_games(count, turns, size, seed)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    del games
+    return (after - before) / count
+
+
+def report(count: int, size: int, turns_list=(0, 30, 60, 120)) -> Dict[str, float]:
+    return {f"turn {turns}": bytes_per_game(count, turns, size) for turns in turns_list}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory held per live game.")
+    parser.add_argument('--games', type=int, default=1000, help="games kept alive per measurement")
+    parser.add_argument('--size', type=int, default=10, help="board side")
+    parser.add_argument('--turns', type=int, action='append',
+                        help="moves played before measuring (repeatable; default 0, 30, 60, 120)")
+    args = parser.parse_args(argv)
+
+    turns = args.turns or (0, 30, 60, 120)
+    for label, value in report(args.games, args.size, turns).items():
+        print(f"{label}: {value:,.0f} bytes/game")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+metrics.py
+
+Opt-in timing metrics for games.
+
+A game created with Game(metrics=Metrics()) times its hot paths and
+counts placement work:
+
+    turn           wall time of a whole move (human moves include the wait
+                   for input)
+    pick_target    AI choosing and firing a shot (includes onhit)
+    onhit          hit bookkeeping: sinking, awarding and removing ships
+    placement      is_possible checks and placing earned ships
+    render         sending a frame to the terminal
+    animation      the computer's hit animation, waits included
+
+    placement_tries     random placement attempts on large boards
+    placement_scanned   legal placements listed while placing ships
+
+Timings go into fixed-bucket histograms that prometheus() renders in the
+Prometheus text format. With a path, every turn is also appended to that
+file as a JSON line with the time each phase took in that turn, which
+shows where a single slow turn went. A game without metrics only pays
+for an `is None` check at each of these points.
+
+Usage:
+    metrics = Metrics("turns.jsonl")
+    game = Game(headless=True, metrics=metrics)
+    game.run_headless()
+    metrics.close()
+    print(metrics.prometheus())
+
+    python -m src.metrics --games 100 --jsonl turns.jsonl --out metrics.prom
+"""
+
+import argparse
+import bisect
+import json
+import random
+from typing import Dict, List, Optional
+
+from src.battleship import STRATEGIES, Game
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+           0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Prefix of every exported metric name
+PREFIX = "battleship"
+
+HELP = {
+    "turn": "Wall time of one move.",
+    "pick_target": "AI choosing and firing a shot.",
+    "onhit": "Hit bookkeeping after a shot lands.",
+    "placement": "Checking and placing earned ships.",
+    "render": "Sending a frame to the terminal.",
+    "animation": "Computer hit animation.",
+    "placement_tries": "Random placement attempts on large boards.",
+    "placement_scanned": "Legal placements listed while placing ships.",
+}
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        # One count per bucket plus the +Inf bucket; not cumulative
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, path: Optional[str] = None, buckets=BUCKETS):
+        """
+        path: optional file that gets one JSON line per finished turn.
+        """
+        self.buckets = buckets
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.file = open(path, 'a') if path else None
+
+        # Phase times and counts since the last end_turn, for the JSON line
+        self.turn_times: Dict[str, float] = {}
+        self.turn_counts: Dict[str, int] = {}
+
+    def observe(self, name: str, seconds: float):
+        """Add one timing to histogram `name`."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        self.turn_times[name] = self.turn_times.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        """Add `n` to counter `name`."""
+        self.counters[name] = self.counters.get(name, 0) + n
+        self.turn_counts[name] = self.turn_counts.get(name, 0) + n
+
+    def end_turn(self, turn: int, side: str, seconds: float):
+        """Record a finished move and write its JSON line."""
+        self.observe("turn", seconds)
+        if self.file is not None:
+            line = {"turn": turn, "side": side}
+            for name, value in self.turn_times.items():
+                line[f"{name}_s"] = round(value, 9)
+            line.update(self.turn_counts)
+            self.file.write(json.dumps(line) + '\n')
+        self.turn_times.clear()
+        self.turn_counts.clear()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def prometheus(self) -> str:
+        """All histograms and counters in the Prometheus text format."""
+        lines: List[str] = []
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            metric = f"{PREFIX}_{name}_seconds"
+            if name in HELP:
+                lines.append(f"# HELP {metric} {HELP[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.total:.9f}")
+            lines.append(f"{metric}_count {histogram.count}")
+
+        for name in sorted(self.counters):
+            metric = f"{PREFIX}_{name}_total"
+            if name in HELP:
+                lines.append(f"# HELP {metric} {HELP[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {self.counters[name]}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, dict]:
+        """Count, total and mean of every histogram, plus the counters."""
+        out: Dict[str, dict] = {
+            name: {"count": h.count, "total_s": h.total, "mean_us": h.total / h.count * 1e6 if h.count else 0.0}
+            for name, h in sorted(self.histograms.items())
+        }
+        out["counters"] = dict(sorted(self.counters.items()))
+        return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play headless games with metrics on.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--size', type=int, default=10, help="board side")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--strategy', default="parity", choices=STRATEGIES)
+    parser.add_argument('--jsonl', help="append one JSON line per turn to this file")
+    parser.add_argument('--out', help="write Prometheus text here instead of stdout")
+    args = parser.parse_args(argv)
+
+    metrics = Metrics(args.jsonl)
+    try:
+        for i in range(args.games):
+            game = Game(headless=True, height=args.size, width=args.size,
+                        p1_strategy=args.strategy, p2_strategy=args.strategy,
+                        rng=random.Random(args.seed + i), metrics=metrics)
+            game.run_headless()
+    finally:
+        metrics.close()
+
+    text = metrics.prometheus()
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    else:
+        print(text, end='')
+
+
+if __name__ == "__main__":
+    main()
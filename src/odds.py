@@ -0,0 +1,331 @@
+"""
+odds.py
+
+Estimate each side's chance of winning a game in progress.
+
+Neither side knows where the other's ships are, so the estimate does not
+either. Each playout copies the game and replaces both fleets with a
+random layout that agrees with everything the attacking side has seen:
+the same ship sizes, no ship on a known miss, every live hit covered,
+and no ship already fully hit (it would have sunk). The copy is then
+played to the end by the headless AI, and the share of playouts each
+side wins is its win probability.
+
+Playouts run in batches on a process pool at low priority, so a game
+server on the same machine keeps its turn latency. Estimation stops at
+the time budget, or earlier once the 95% confidence interval of both
+sides' probabilities is narrower than the requested margin.
+
+Usage:
+    odds = estimate(game, budget=1.0, margin=0.02)
+    print(f"Player {odds.player:.0%}  Computer {odds.computer:.0%}")
+
+    # Live odds every turn: keep the pool between estimates
+    with OddsEstimator() as estimator:
+        odds = estimator.estimate(game, budget=0.5)
+
+    python -m src.odds --turns 40 --budget 2
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.battleship import Board, Game
+from src.bitboard import free_placements, mask_to_coords
+from src.snapshot import dumps, loads
+
+# Playouts per worker task; small so the time budget is kept
+BATCH = 8
+
+# Fewest playouts before the confidence interval is trusted
+MIN_SAMPLES = 64
+
+# z for a 95% confidence interval
+Z95 = 1.96
+
+# Worker priority increase (see os.nice)
+NICE = 10
+
+# Attempts at a consistent layout before the playout is skipped
+SAMPLE_TRIES = 50
+
+# Random placement guesses before listing every free placement
+RANDOM_TRIES = 20
+
+
+class Odds(NamedTuple):
+    player: float       # Probability the Player wins
+    computer: float     # Probability the Computer wins
+    undecided: float    # Ties and games that hit the turn limit
+    samples: int        # Playouts behind the estimate
+    skipped: int        # Playouts dropped: no consistent layout was found
+    margin: float       # Widest 95% confidence half-width of the two sides
+    seconds: float      # Wall time spent
+
+
+def covering(y: int, x: int, size: int, height: int, width: int) -> List[int]:
+    """Masks of every on-board placement of a ship of `size` covering (y, x)."""
+    masks = []
+    line = (1 << size) - 1
+    for x0 in range(max(0, x - size + 1), min(x, width - size) + 1):
+        masks.append(line << (y * width + x0))
+    if size > 1:
+        column = sum(1 << (i * width) for i in range(size))
+        for y0 in range(max(0, y - size + 1), min(y, height - size) + 1):
+            masks.append(column << (y0 * width + x))
+    return masks
+
+
+def random_free_mask(occupied: int, height: int, width: int, size: int,
+                     rng: random.Random) -> Optional[int]:
+    """A placement of `size` that avoids `occupied`, or None if there is none."""
+    # Mostly empty boards: a few guesses almost always land
+    column = sum(1 << (i * width) for i in range(size))
+    for _ in range(RANDOM_TRIES):
+        if rng.randint(0, 1):
+            mask = ((1 << size) - 1) << (rng.randint(0, height - 1) * width + rng.randint(0, width - size))
+        else:
+            mask = column << (rng.randint(0, height - size) * width + rng.randint(0, width - 1))
+        if not mask & occupied:
+            return mask
+
+    masks = [mask for mask, _ in free_placements(occupied, height, width, size)]
+    return rng.choice(masks) if masks else None
+
+
+def sample_fleet(board: Board, misses: int, hits: int,
+                 rng: random.Random) -> Optional[List[Tuple[int, int]]]:
+    """
+    A random layout of the board's live ship sizes, as (size, mask) pairs,
+    consistent with the attacker's misses and live hits. None if no
+    consistent layout was found.
+    """
+    height, width = board.height, board.width
+    for _ in range(SAMPLE_TRIES):
+        sizes = sorted(board.typebyID.values(), reverse=True)
+        occupied = misses
+        uncovered = hits
+        fleet: List[Tuple[int, int]] = []
+
+        # First cover every hit, one lowest uncovered hit at a time
+        while uncovered and sizes:
+            cell = (uncovered & -uncovered).bit_length() - 1
+            y, x = divmod(cell, width)
+            options = [
+                (size, mask)
+                for size in set(sizes)
+                for mask in covering(y, x, size, height, width)
+                # A ship whose every cell is hit would already be sunk
+                if not mask & occupied and mask & ~hits
+            ]
+            if not options:
+                break
+            size, mask = rng.choice(options)
+            sizes.remove(size)
+            fleet.append((size, mask))
+            occupied |= mask
+            uncovered &= ~mask
+        if uncovered:
+            continue
+
+        # Then the ships nobody has hit yet, away from the hits
+        occupied |= hits
+        for size in sizes:
+            mask = random_free_mask(occupied, height, width, size, rng)
+            if mask is None:
+                break
+            fleet.append((size, mask))
+            occupied |= mask
+        else:
+            return fleet
+    return None
+
+
+def resample(game: Game, rng: random.Random) -> bool:
+    """
+    Replace both fleets with layouts their attackers cannot tell apart.
+    Returns False, leaving the game unchanged, when no consistent layout
+    was found for one of them; playing on would use the real hidden fleet.
+    """
+    layouts = []
+    for board, atk in ((game.p1, game.p2_atk), (game.p2, game.p1_atk)):
+        hits = atk.hit_mask & board.taken_mask
+        fleet = sample_fleet(board, atk.miss_mask, hits, rng)
+        if fleet is None:
+            return False
+        layouts.append((board, hits, fleet))
+
+    for board, hits, fleet in layouts:
+        for ship_id in list(board.typebyID):
+            board.remove_ship(ship_id)
+        for size, mask in fleet:
+            ship_id = game.new_ship_id()
+            coords = mask_to_coords(mask, board.width)
+            board.add_ship(ship_id, size, coords)
+            for position, (y, x) in enumerate(board.ship_coords(ship_id)):
+                if (hits >> (y * board.width + x)) & 1:
+                    board.unhit_bits[ship_id] &= ~(1 << position)
+    return True
+
+
+def play_batch(task: Tuple[bytes, int, int, float]) -> Tuple[int, int, int, int]:
+    """
+    Worker entry point: play up to `count` playouts of a snapshot, stopping
+    early at `deadline` (time.time()).
+
+    Returns:
+        (Player wins, Computer wins, undecided, skipped)
+    """
+    blob, seed, count, deadline = task
+    rng = random.Random(seed)
+    wins = {'Player': 0, 'Computer': 0}
+    undecided = 0
+    skipped = 0
+    for _ in range(count):
+        if time.time() > deadline:
+            break
+        game = loads(blob, rng=rng, headless=True)
+        if not resample(game, rng):
+            skipped += 1
+            continue
+        winner = game.run_headless().winner
+        if winner in wins:
+            wins[winner] += 1
+        else:
+            undecided += 1
+    return wins['Player'], wins['Computer'], undecided, skipped
+
+
+def half_width(wins: int, samples: int) -> float:
+    """Half-width of the 95% Wilson score interval of a win rate."""
+    if not samples:
+        return 1.0
+    p = wins / samples
+    z2 = Z95 * Z95
+    return Z95 * math.sqrt(p * (1 - p) / samples + z2 / (4 * samples * samples)) / (1 + z2 / samples)
+
+
+def lower_priority():
+    """Pool initializer: let game processes on this machine go first."""
+    try:
+        os.nice(NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class OddsEstimator:
+    def __init__(self, workers: Optional[int] = None):
+        """Process pool for playouts; workers defaults to every core."""
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=lower_priority)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def estimate(self, game: Game, budget: float = 1.0, margin: float = 0.02,
+                 max_samples: int = 100000, seed: Optional[int] = None) -> Odds:
+        """
+        Win probabilities of `game` between two moves. Stops after `budget`
+        seconds, after `max_samples` playouts, or once both sides are known
+        to within +-`margin`. The game itself is not changed. Playouts
+        with no consistent layout are left out of the probabilities and
+        counted in Odds.skipped.
+        """
+        start = time.time()
+        deadline = start + budget
+        blob = dumps(game)
+        base = random.getrandbits(32) if seed is None else seed
+        counts = [0, 0, 0, 0]
+        tasks = 0
+
+        def done() -> bool:
+            samples = sum(counts[:3])
+            # Skipped playouts count towards max_samples so a position
+            # that never yields a layout still stops
+            if samples + counts[3] >= max_samples or time.time() >= deadline:
+                return True
+            return samples >= MIN_SAMPLES and max(half_width(counts[0], samples),
+                                                  half_width(counts[1], samples)) <= margin
+
+        def next_task():
+            nonlocal tasks
+            tasks += 1
+            return blob, (base << 32) | tasks, BATCH, deadline
+
+        if self.pool is None:
+            while not done():
+                for i, n in enumerate(play_batch(next_task())):
+                    counts[i] += n
+        else:
+            # Two batches in flight per worker keeps every core busy
+            pending = {self.pool.submit(play_batch, next_task()) for _ in range(self.workers * 2)}
+            while pending:
+                finished, pending = wait(pending, timeout=max(0.0, deadline - time.time()),
+                                         return_when=FIRST_COMPLETED)
+                for future in finished:
+                    for i, n in enumerate(future.result()):
+                        counts[i] += n
+                if done():
+                    break
+                pending |= {self.pool.submit(play_batch, next_task()) for _ in finished}
+            # Playouts still running stop at the deadline by themselves
+            for future in pending:
+                future.cancel()
+
+        samples = sum(counts[:3])
+        return Odds(
+            player=counts[0] / (samples or 1),
+            computer=counts[1] / (samples or 1),
+            undecided=counts[2] / (samples or 1),
+            samples=samples,
+            skipped=counts[3],
+            margin=max(half_width(counts[0], samples), half_width(counts[1], samples)),
+            seconds=time.time() - start,
+        )
+
+
+def estimate(game: Game, budget: float = 1.0, margin: float = 0.02,
+             workers: Optional[int] = None, seed: Optional[int] = None) -> Odds:
+    """One-off estimate on a temporary pool (see OddsEstimator.estimate)."""
+    with OddsEstimator(workers) as estimator:
+        return estimator.estimate(game, budget, margin, seed=seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate win odds of a headless game in progress.")
+    parser.add_argument('--turns', type=int, default=40, help="moves played before estimating")
+    parser.add_argument('--size', type=int, default=10, help="board side")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=1.0, help="seconds to spend")
+    parser.add_argument('--margin', type=float, default=0.02, help="stop at this 95%% half-width")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    game = Game(headless=True, height=args.size, width=args.size, rng=random.Random(args.seed))
+    game.start()
+    while game.turns < args.turns and game.get_winner() is None:
+        game.play_turn()
+
+    odds = estimate(game, args.budget, args.margin, args.workers, seed=args.seed)
+    print(f"turn {game.turns}: Player {odds.player:.1%}  Computer {odds.computer:.1%}  "
+          f"undecided {odds.undecided:.1%}  (+-{odds.margin:.1%}, {odds.samples} playouts, "
+          f"{odds.skipped} skipped, {odds.seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+openings.py
+
+Precomputed opening book for density targeting.
+
+Until a shot hits, the density heat map (see Attack.pick_density_shot)
+depends only on the board size, the fleet and which cells missed, so the
+opening of every game walks the same tree. `build` walks that tree
+offline: starting from an empty board it computes the best cells, then
+for each of them the position after it missed, breadth first up to a
+given depth. Lookups return the same cells the live heat map would, so
+games play exactly as before, minus the per-turn AI work.
+
+The book is a flat file of fixed-size (misses, best cells) records
+sorted by misses. Each process maps it read-only with mmap the first time
+a game of that shape asks for it, so all workers on a machine share one
+copy through the page cache. Without a book file, games compute every
+shot as usual.
+
+Books live in $BATTLESHIP_CACHE (default ~/.cache/battleship), one per
+board size and fleet.
+
+Usage:
+    python -m src.openings --size 10 --depth 20
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.bitboard import bit_positions
+
+MAGIC = b'BSOB'
+VERSION = 1
+# magic, version, height, width, key bytes, entries, number of ships
+HEADER = struct.Struct('<4sBHHHIB')
+
+# Shots deep the default book goes, and its size limit
+DEPTH = 20
+MAX_ENTRIES = 200000
+
+# Per process: (height, width, fleet) -> mapped book, or None if there is no file
+_books: Dict[Tuple[int, int, Tuple[int, ...]], Optional["OpeningBook"]] = {}
+
+
+class OpeningBook:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.height, self.width, self.key_size, self.entries, ships = \
+            HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book this version can read")
+        self.fleet = tuple(self.map[HEADER.size:HEADER.size + ships])
+        self.start = HEADER.size + ships
+        if len(self.map) != self.start + self.entries * 2 * self.key_size:
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self.entries
+
+    def lookup(self, misses: int) -> Optional[int]:
+        """Best cells after exactly these misses (and no hits), or None if not in the book."""
+        key_size = self.key_size
+        key = misses.to_bytes(key_size, 'big')
+        stride = 2 * key_size
+
+        # Binary search over the sorted keys
+        lo, hi = 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = self.start + mid * stride
+            found = self.map[offset:offset + key_size]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return int.from_bytes(self.map[offset + key_size:offset + stride], 'big')
+        return None
+
+    def close(self):
+        self.map.close()
+
+
+def fleet_key(fleet) -> Tuple[int, ...]:
+    """Sorted ship sizes from a size -> count mapping or a list of sizes."""
+    if isinstance(fleet, dict):
+        return tuple(sorted(Counter(fleet).elements()))
+    return tuple(sorted(fleet))
+
+
+def default_path(height: int, width: int, fleet) -> str:
+    directory = os.environ.get("BATTLESHIP_CACHE", os.path.expanduser("~/.cache/battleship"))
+    sizes = '-'.join(str(size) for size in fleet_key(fleet))
+    return os.path.join(directory, f"openings-{height}x{width}-{sizes}.bin")
+
+
+def opening_book(height: int, width: int, fleet) -> Optional[OpeningBook]:
+    """The book for this board shape and fleet, mapped on first use; None if none was built."""
+    key = (height, width, fleet_key(fleet))
+    if key not in _books:
+        path = default_path(height, width, key[2])
+        try:
+            _books[key] = OpeningBook(path)
+        except (OSError, ValueError):
+            _books[key] = None
+    return _books[key]
+
+
+def build(height: int, width: int, fleet: Iterable[int], depth: int = DEPTH,
+          max_entries: int = MAX_ENTRIES) -> Dict[int, int]:
+    """
+    Misses -> best cells for every all-miss position the density AI can
+    reach in its first `depth` shots (every tie followed), breadth first
+    until max_entries.
+    """
+    # Imported here: src.battleship imports this module
+    from src.battleship import density_targets
+
+    counts = Counter(fleet)
+    table: Dict[int, int] = {}
+    frontier = {0}
+    for _ in range(depth + 1):
+        next_frontier = set()
+        for misses in sorted(frontier):
+            best = density_targets(height, width, counts, misses, 0, misses)
+            table[misses] = best
+            if len(table) >= max_entries:
+                return table
+            for idx in bit_positions(best):
+                next_frontier.add(misses | (1 << idx))
+        frontier = next_frontier - table.keys()
+    return table
+
+
+def write(path: str, height: int, width: int, fleet: Iterable[int], table: Dict[int, int]):
+    """Save `table` as a book file; replaced atomically so running readers never see half a file."""
+    sizes = fleet_key(fleet)
+    key_size = (height * width + 7) // 8
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, height, width, key_size, len(table), len(sizes)))
+        f.write(bytes(sizes))
+        for misses in sorted(table):
+            f.write(misses.to_bytes(key_size, 'big'))
+            f.write(table[misses].to_bytes(key_size, 'big'))
+    os.replace(tmp, path)
+
+    # This process may have cached "no book" or an older one
+    _books.pop((height, width, sizes), None)
+
+
+def main(argv=None):
+    from src.battleship import FLEET
+
+    parser = argparse.ArgumentParser(description="Precompute the density AI's opening book.")
+    parser.add_argument('--size', type=int, default=10, help="board side")
+    parser.add_argument('--depth', type=int, default=DEPTH, help="opening shots covered")
+    parser.add_argument('--max-entries', type=int, default=MAX_ENTRIES)
+    parser.add_argument('--out', help="book file (default: the path games look in)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = build(args.size, args.size, FLEET, args.depth, args.max_entries)
+    path = args.out or default_path(args.size, args.size, FLEET)
+    write(path, args.size, args.size, FLEET, table)
+    print(f"{len(table)} positions in {time.perf_counter() - start:.1f}s -> {path}")
+
+
+if __name__ == "__main__":
+    main()
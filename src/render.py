@@ -0,0 +1,74 @@
+"""
+render.py
+
+Incremental drawing for the curses screens.
+
+A ScreenRenderer remembers what it last wrote at every screen position.
+Each frame the screens describe everything they want on screen, but only
+positions whose text or colour changed are sent to the terminal, and the
+whole frame goes out with a single noutrefresh/doupdate. Moving the cursor
+therefore costs two cells instead of a full repaint, which matters over
+slow SSH links.
+"""
+
+import curses
+from time import perf_counter
+from typing import Dict, Tuple
+
+
+class ScreenRenderer:
+    def __init__(self, stdscr, metrics=None):
+        """metrics: optional Metrics (see src/metrics.py) to time each flush."""
+        self.stdscr = stdscr
+        self.metrics = metrics
+        # (screen y, screen x) -> (text, attr) as last written
+        self.frame: Dict[Tuple[int, int], Tuple[str, int]] = {}
+        self.size = stdscr.getmaxyx()
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Forget the last frame and blank the window, so the next frame is
+        drawn in full. Use after another screen drew on the same window.
+        """
+        self.stdscr.erase()
+        self.frame.clear()
+
+    def text(self, y, x, text, attr=0):
+        """Queue `text` at (y, x); skipped if it is already on screen."""
+        key = (y, x)
+        old = self.frame.get(key)
+        if old == (text, attr):
+            return
+
+        # Shorter than what was there: blank out the leftover characters
+        if old is not None and len(old[0]) > len(text):
+            text_out = text + ' ' * (len(old[0]) - len(text))
+        else:
+            text_out = text
+
+        try:
+            self.stdscr.addstr(y, x, text_out, attr)
+        except curses.error:
+            # Writing the bottom-right corner moves the cursor off screen
+            pass
+        self.frame[key] = (text, attr)
+
+    def flush(self):
+        """Send every queued change to the terminal in one update."""
+        # A resized terminal is repainted from scratch: blank it and write
+        # the whole frame again, so the screen is never left empty while
+        # the caller waits for a key
+        size = self.stdscr.getmaxyx()
+        if size != self.size:
+            self.size = size
+            frame = dict(self.frame)
+            self.invalidate()
+            for (y, x), (text, attr) in frame.items():
+                self.text(y, x, text, attr)
+
+        start = perf_counter()
+        self.stdscr.noutrefresh()
+        curses.doupdate()
+        if self.metrics is not None:
+            self.metrics.observe("render", perf_counter() - start)
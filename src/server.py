@@ -0,0 +1,424 @@
+"""
+server.py
+
+Asyncio server that hosts many games at once, plus a load-test client.
+
+Clients connect over TCP or a Unix socket and send one JSON object per
+line; every request gets one JSON line back. The client plays the Player
+side against the computer:
+
+    {"op": "new", "height": 10, "width": 10, "strategy": "parity", "seed": 1}
+        -> {"ok": true, "match": 7, "fleet": [2, 3, 4, 5]}
+    {"op": "place", "match": 7, "size": 3, "y": 0, "x": 4, "vertical": true}
+        -> {"ok": true, "fleet": [2, 4, 5], "reply": null}
+    {"op": "fire", "match": 7, "y": 5, "x": 5}
+        -> {"ok": true, "hit": false, "sunk": null, "reply": [2, 3],
+            "reply_hit": true, "winner": null}
+    {"op": "close", "match": 7}
+        -> {"ok": true}
+
+Once the whole fleet is placed the turn order is drawn, and if the
+computer moves first its shot comes back as "reply". Ships the player
+earns are placed automatically. Errors come back as {"ok": false,
+"error": "..."}.
+
+Games run headless. A parity move is well under a millisecond and runs
+on the event loop. Density and exact moves can take tens of milliseconds
+on larger boards, so requests for those matches run on a worker thread
+and the event loop keeps serving other connections in between. Matches
+belong to the connection that created them and are dropped when it
+disconnects.
+
+Usage:
+    python -m src.server serve --port 8765
+    python -m src.server --port 8765            (serve is the default)
+    python -m src.server serve --unix /tmp/battleship.sock
+    python -m src.server load --port 8765 --matches 200 --idle 10000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+from src.battleship import FLEET, STRATEGIES, Game
+
+# Largest board side a client may ask for; keeps setup and parity moves short
+MAX_SIDE = 100
+
+# Matches one server process will hold before refusing "new"
+MAX_MATCHES = 100000
+
+# AI strategies whose moves can take tens of milliseconds (density heat
+# maps, the exact solver); their requests run off the event loop
+SLOW_STRATEGIES = ("density", "exact")
+
+
+class ProtocolError(Exception):
+    """A request the server cannot carry out; reported to the client."""
+
+
+class Match:
+    """One game between a remote client (Player) and the computer."""
+
+    def __init__(self, height: int, width: int, strategy: str, rng: random.Random):
+        self.game = Game(headless=True, p2_strategy=strategy, height=height, width=width,
+                         place_ships=False, rng=rng)
+        self.strategy = strategy
+        game = self.game
+        game.p2.auto_place_ships()
+
+        # The Player side is driven by the client, not the AI
+        game.p1_atk.auto = False
+        # Same side order as Game.moves; turn order lives in game.p1_first
+        game.moves = [self.remote_move, self.computer_move]
+
+        self.fleet: List[int] = list(FLEET)   # Ships still to place
+        self.shot: Optional[List[int]] = None  # Client's shot for remote_move
+        self.reply: Optional[List[int]] = None # Computer's last shot
+        self.winner: Optional[str] = None
+
+    def remote_move(self):
+        """Player's turn: fire the client's shot and place earned ships."""
+        self.game.p1_atk.shoot(self.shot)
+        self.game.auto_place_pending(self.game.p1)
+
+    def computer_move(self):
+        """Same as Game.auto_move, but keeps the shot for the response."""
+        game = self.game
+        self.reply = None
+        if game.p2_atk.has_guesses_left():
+            self.reply = game.p2_atk.auto_pick_target()
+            game.auto_place_pending(game.p2)
+
+    def place(self, size: int, y: int, x: int, vertical: bool) -> dict:
+        if size not in self.fleet:
+            raise ProtocolError(f"no ship of size {size} left to place")
+        board = self.game.p1
+        if vertical:
+            coords = [[y + i, x] for i in range(size)]
+        else:
+            coords = [[y, x + i] for i in range(size)]
+        if not all(0 <= cy < board.height and 0 <= cx < board.width for cy, cx in coords):
+            raise ProtocolError("ship does not fit on the board")
+        if not all(board.is_free(cy, cx) for cy, cx in coords):
+            raise ProtocolError("ship overlaps another ship")
+
+        board.add_ship(self.game.new_ship_id(), size, coords)
+        self.fleet.remove(size)
+
+        response = {"fleet": self.fleet, "reply": None, "reply_hit": False}
+        if not self.fleet:
+            # Fleet complete: draw who starts; the computer may shoot first
+            self.game.start()
+            if not self.game.p1_first:
+                self.computer_turn(response)
+        return response
+
+    def fire(self, y: int, x: int) -> dict:
+        game = self.game
+        if self.fleet:
+            raise ProtocolError("place the whole fleet first")
+        if self.winner is not None:
+            raise ProtocolError("game is over")
+        if not (0 <= y < game.height and 0 <= x < game.width):
+            raise ProtocolError("shot is off the board")
+
+        atk = game.p1_atk
+        if atk.is_miss(y, x):
+            raise ProtocolError("already missed there")
+        if atk.is_live_hit(y, x) and game.p2.is_taken([y, x]):
+            raise ProtocolError("already hit that ship cell")
+
+        found = game.p2.ship_at(y, x)
+        target = found[0] if found else None
+        size = game.p2.typebyID.get(target)
+        self.shot = [y, x]
+        game.play_turn()
+
+        response = {
+            "hit": not atk.is_miss(y, x),
+            # The target ship is gone from the board once it is sunk
+            "sunk": size if target is not None and target not in game.p2.typebyID else None,
+            "reply": None,
+            "reply_hit": False,
+        }
+        self.winner = game.get_winner()
+        if self.winner is None:
+            self.computer_turn(response)
+        response["winner"] = self.winner
+        return response
+
+    def computer_turn(self, response: dict):
+        """Play the computer's move and add its shot to `response`."""
+        game = self.game
+        game.play_turn()
+        self.winner = game.get_winner()
+        if self.reply is not None:
+            y, x = self.reply
+            response["reply"] = self.reply
+            response["reply_hit"] = not game.p2_atk.is_miss(y, x)
+        response["winner"] = self.winner
+
+
+class GameServer:
+    def __init__(self, max_matches: int = MAX_MATCHES, seed: Optional[int] = None):
+        self.matches: Dict[int, Match] = {}
+        self.max_matches = max_matches
+        self.next_id = 0
+        # Seeds for matches that do not bring their own
+        self.seeds = random.Random(seed)
+
+    def dispatch(self, request: dict, owned: Set[int]) -> dict:
+        """Carry out one request for a connection owning the `owned` matches."""
+        if not isinstance(request, dict):
+            raise ProtocolError("request must be a JSON object")
+        op = request.get("op")
+        if op == "new":
+            return self.new_match(request, owned)
+
+        match_id = request.get("match")
+        if match_id not in owned:
+            raise ProtocolError(f"unknown match {match_id}")
+        match = self.matches[match_id]
+
+        if op == "place":
+            return match.place(int(request["size"]), int(request["y"]), int(request["x"]),
+                               bool(request.get("vertical", False)))
+        if op == "fire":
+            return match.fire(int(request["y"]), int(request["x"]))
+        if op == "close":
+            owned.discard(match_id)
+            del self.matches[match_id]
+            return {}
+        raise ProtocolError(f"unknown op {op!r}")
+
+    def is_slow(self, request, owned: Set[int]) -> bool:
+        """True if `request` may play a move of a SLOW_STRATEGIES match."""
+        if not isinstance(request, dict) or request.get("op") not in ("place", "fire"):
+            return False
+        match_id = request.get("match")
+        return match_id in owned and self.matches[match_id].strategy in SLOW_STRATEGIES
+
+    def new_match(self, request: dict, owned: Set[int]) -> dict:
+        if len(self.matches) >= self.max_matches:
+            raise ProtocolError("server is full")
+        height = int(request.get("height", 10))
+        width = int(request.get("width", 10))
+        if max(height, width) > MAX_SIDE:
+            raise ProtocolError(f"board sides are limited to {MAX_SIDE}")
+        strategy = request.get("strategy", "parity")
+        if strategy not in STRATEGIES:
+            raise ProtocolError(f"strategy must be one of {', '.join(STRATEGIES)}")
+        seed = request.get("seed")
+        if seed is None:
+            seed = self.seeds.getrandbits(64)
+
+        try:
+            match = Match(height, width, strategy, random.Random(seed))
+        except ValueError as e:
+            raise ProtocolError(str(e))
+
+        match_id = self.next_id
+        self.next_id += 1
+        self.matches[match_id] = match
+        owned.add(match_id)
+        return {"match": match_id, "fleet": match.fleet}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection until it closes; its matches go with it."""
+        owned: Set[int] = set()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit; the rest of the line is
+                    # still unread, so the stream cannot be resynchronized
+                    writer.write(json.dumps({"ok": False, "error": "request line too long"}).encode() + b"\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if self.is_slow(request, owned):
+                        # A connection sends one request at a time, so its
+                        # matches are never touched by two threads at once
+                        response = await loop.run_in_executor(None, self.dispatch, request, owned)
+                    else:
+                        response = self.dispatch(request, owned)
+                    response["ok"] = True
+                except (ProtocolError, ValueError, KeyError, TypeError) as e:
+                    response = {"ok": False, "error": str(e) or type(e).__name__}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for match_id in owned:
+                self.matches.pop(match_id, None)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, path=unix, backlog=4096)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+async def connect(host: str, port: int, unix: Optional[str]):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+
+async def request(reader, writer, message: dict) -> dict:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def play_client(host, port, unix, rng: random.Random, latencies: List[float]) -> Optional[str]:
+    """
+    Load-test stand-in for a player: place the fleet at random spots and
+    fire at random cells until the game ends. Returns the winner.
+    """
+    reader, writer = await connect(host, port, unix)
+    try:
+        match = await request(reader, writer, {"op": "new", "seed": rng.getrandbits(32)})
+        match_id = match["match"]
+
+        for size in FLEET:
+            while True:
+                response = await request(reader, writer, {
+                    "op": "place", "match": match_id, "size": size,
+                    "y": rng.randrange(10), "x": rng.randrange(10), "vertical": rng.random() < 0.5,
+                })
+                if response["ok"]:
+                    break
+        if response.get("winner"):
+            return response["winner"]
+
+        cells = [(y, x) for y in range(10) for x in range(10)]
+        missed = set()
+        while True:
+            rng.shuffle(cells)
+            for y, x in cells:
+                if (y, x) in missed:
+                    continue
+                start = time.perf_counter()
+                response = await request(reader, writer, {"op": "fire", "match": match_id, "y": y, "x": x})
+                latencies.append(time.perf_counter() - start)
+                if not response["ok"]:
+                    continue
+                if not response["hit"]:
+                    missed.add((y, x))
+                if response["winner"]:
+                    return response["winner"]
+    finally:
+        writer.close()
+
+
+async def idle_client(host, port, unix, ready: asyncio.Event, done: asyncio.Event):
+    """Open a connection, start a match and hold it until `done` is set."""
+    reader, writer = await connect(host, port, unix)
+    try:
+        await request(reader, writer, {"op": "new"})
+        ready.set()
+        await done.wait()
+    finally:
+        writer.close()
+
+
+async def load_test(host: str, port: int, unix: Optional[str], matches: int,
+                    idle: int, seed: int) -> Dict[str, object]:
+    """
+    Hold `idle` open matches while `matches` clients play full games
+    concurrently; report per-move latency and throughput.
+    """
+    done = asyncio.Event()
+    idlers = []
+    for _ in range(idle):
+        ready = asyncio.Event()
+        idlers.append(asyncio.ensure_future(idle_client(host, port, unix, ready, done)))
+        await ready.wait()
+
+    latencies: List[float] = []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    winners = await asyncio.gather(*(
+        play_client(host, port, unix, random.Random(rng.getrandbits(64)), latencies)
+        for _ in range(matches)
+    ))
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    await asyncio.gather(*idlers)
+
+    latencies.sort()
+    count = len(latencies) or 1
+    return {
+        "idle_matches": idle,
+        "games": matches,
+        "player_wins": winners.count("Player"),
+        "moves": len(latencies),
+        "moves_per_s": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": latencies[count // 2] * 1000 if latencies else None,
+        "p99_ms": latencies[min(count - 1, count * 99 // 100)] * 1000 if latencies else None,
+    }
+
+
+def raise_fd_limit():
+    """Lift the open-file soft limit to the hard limit; one socket per match."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    commands = ("serve", "load")
+    # No command given (e.g. "main.py serve --port 7777"): serve
+    if not argv or argv[0] not in commands + ("-h", "--help"):
+        argv = ["serve", *argv]
+
+    parser = argparse.ArgumentParser(description="Host battleship games over a socket.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in commands:
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--host", default="127.0.0.1")
+        cmd.add_argument("--port", type=int, default=8765)
+        cmd.add_argument("--unix", help="Unix socket path instead of TCP")
+        cmd.add_argument("--seed", type=int, default=None)
+    sub.choices["serve"].add_argument("--max-matches", type=int, default=MAX_MATCHES)
+    sub.choices["load"].add_argument("--matches", type=int, default=100, help="games played to the end")
+    sub.choices["load"].add_argument("--idle", type=int, default=0, help="open matches held during the run")
+    args = parser.parse_args(argv)
+
+    raise_fd_limit()
+    if args.command == "serve":
+        server = GameServer(args.max_matches, args.seed)
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+    else:
+        report = asyncio.run(load_test(args.host, args.port, args.unix, args.matches,
+                                       args.idle, args.seed or 0))
+        for key, value in report.items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
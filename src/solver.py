@@ -0,0 +1,373 @@
+"""
+solver.py
+
+Exact fleet enumeration for the endgame.
+
+Given what an attacker has seen (misses, hits on ships still afloat) and
+the sizes of the ships still afloat, the solver counts every way the
+fleet could be laid out, and for each cell how many of those layouts put
+a ship there. Dividing the two gives the exact chance each cell holds a
+ship, which beats any heuristic once few ships and many misses remain.
+
+A layout is a set of non-overlapping placements, one per ship, that
+avoids every miss, covers every hit, and leaves each ship at least one
+cell that is not hit yet (a fully hit ship would already be sunk).
+
+The search branches on the lowest hit no ship covers yet (every layout
+has exactly one ship there), then places the untouched ships smallest
+first, with same-sized ships in increasing placement order so each
+layout is counted once. States are (sizes left, occupied cells, lowest
+placement allowed); their counts are memoized, and a second pass down
+the state graph turns the counts into per-cell weights.
+
+Large searches are cut off by a node cap (reproducible) or a deadline
+(wall time); solve() then returns None and the caller falls back to a
+heuristic.
+
+Usage:
+    solution = solve_attack(game.p2_atk, max_nodes=20000)
+    if solution is not None:
+        best = max(solution.weights, key=solution.weights.get)
+
+    python -m src.solver --turns 150
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.bitboard import TABLE_MAX_CELLS, bit_positions, free_placements, placement_table
+
+# Check the deadline once every this many nodes
+DEADLINE_EVERY = 256
+
+# Whole-fleet random draws random_fleet tries before counting layouts
+FLEET_DRAWS = 100
+
+# Search nodes random_fleet may spend counting, and again backtracking
+PLACEMENT_MAX_NODES = 20000
+
+# (sizes left, occupied cells, lowest placement index allowed)
+State = Tuple[Tuple[int, ...], int, int]
+
+
+class Solution(NamedTuple):
+    arrangements: int           # Layouts consistent with the evidence
+    weights: Dict[int, int]     # Cell index -> layouts with a ship on that cell
+    nodes: int                  # Search states expanded
+
+    def probability(self, idx: int) -> float:
+        """Chance that cell `idx` holds a ship."""
+        return self.weights.get(idx, 0) / self.arrangements if self.arrangements else 0.0
+
+
+class BudgetExceeded(Exception):
+    """Raised inside the search when the node cap or deadline is hit."""
+
+
+class FleetSolver:
+    def __init__(self, height: int, width: int, sizes, misses: int, hits: int,
+                 max_nodes: Optional[int] = None, deadline: Optional[float] = None):
+        """
+        sizes: sizes of the ships still afloat (duplicates allowed).
+        misses, hits: bitboards of known empty cells and of hit cells of
+        ships still afloat.
+        deadline: time.monotonic() value after which the search gives up.
+        """
+        self.height = height
+        self.width = width
+        self.sizes = tuple(sorted(sizes))
+        self.hits = hits
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.nodes = 0
+
+        # Placements of each size that avoid every miss, and for each cell
+        # the ones covering it (only needed where hits are)
+        self.placements: Dict[int, List[int]] = {}
+        self.covering: Dict[int, Dict[int, List[int]]] = {}
+        for size in set(self.sizes):
+            if height * width <= TABLE_MAX_CELLS:
+                masks = [mask for mask, _ in placement_table(height, width, size) if not mask & misses]
+            else:
+                masks = [mask for mask, _ in free_placements(misses, height, width, size)]
+            self.placements[size] = masks
+            self.covering[size] = {
+                idx: [mask for mask in masks if (mask >> idx) & 1] for idx in bit_positions(hits)
+            }
+
+        self.counts: Dict[State, int] = {}
+        # State -> (placement, next state) for every move that leads to a layout
+        self.edges: Dict[State, List[Tuple[int, State]]] = {}
+
+    def upper_bound(self) -> int:
+        """Product of each ship's placement count; the search is never bigger than this."""
+        bound = 1
+        for size in self.sizes:
+            bound *= max(1, len(self.placements[size]))
+        return bound
+
+    def count(self, state: State) -> int:
+        """Number of ways to finish the layout from `state`."""
+        known = self.counts.get(state)
+        if known is not None:
+            return known
+
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded
+        if self.deadline is not None and self.nodes % DEADLINE_EVERY == 0 \
+                and time.monotonic() > self.deadline:
+            raise BudgetExceeded
+
+        sizes, occupied, floor = state
+        uncovered = self.hits & ~occupied
+        edges: List[Tuple[int, State]] = []
+        total = 0
+
+        if not sizes:
+            total = 0 if uncovered else 1
+
+        # Each ship can cover at most size - 1 hits and stay afloat
+        elif uncovered.bit_count() > sum(sizes) - len(sizes):
+            total = 0
+
+        elif uncovered:
+            # Some ship has to cover the lowest uncovered hit
+            idx = (uncovered & -uncovered).bit_length() - 1
+            for size in sorted(set(sizes)):
+                rest = list(sizes)
+                rest.remove(size)
+                rest = tuple(rest)
+                for mask in self.covering[size][idx]:
+                    if mask & occupied or not mask & ~self.hits:
+                        continue
+                    child = (rest, occupied | mask, 0)
+                    ways = self.count(child)
+                    if ways:
+                        total += ways
+                        edges.append((mask, child))
+
+        else:
+            # All hits covered: place the smallest ship left on open water
+            size = sizes[0]
+            rest = sizes[1:]
+            masks = self.placements[size]
+            for i in range(floor, len(masks)):
+                mask = masks[i]
+                if mask & occupied:
+                    continue
+                # Same-sized ships go in increasing order, so a layout is counted once
+                child = (rest, occupied | mask, i + 1 if rest and rest[0] == size else 0)
+                ways = self.count(child)
+                if ways:
+                    total += ways
+                    edges.append((mask, child))
+
+        self.counts[state] = total
+        if edges:
+            self.edges[state] = edges
+        return total
+
+    def solve(self) -> Optional[Solution]:
+        """Count every layout and weigh each cell; None if the budget ran out."""
+        root: State = (self.sizes, 0, 0)
+        try:
+            total = self.count(root)
+        except BudgetExceeded:
+            return None
+
+        # Walk the state graph from the root, fewest ships placed first:
+        # a placement's weight is (ways to reach its state) x (ways to finish after it)
+        reach: Dict[State, int] = {root: 1}
+        mask_weights: Dict[int, int] = {}
+        for state in sorted(self.edges, key=lambda s: -len(s[0])):
+            ways_here = reach.get(state, 0)
+            if not ways_here:
+                continue
+            for mask, child in self.edges[state]:
+                reach[child] = reach.get(child, 0) + ways_here
+                mask_weights[mask] = mask_weights.get(mask, 0) + ways_here * self.counts[child]
+
+        weights: Dict[int, int] = {}
+        for mask, weight in mask_weights.items():
+            for idx in bit_positions(mask):
+                weights[idx] = weights.get(idx, 0) + weight
+        return Solution(total, weights, self.nodes)
+
+    def sample(self, rng: random.Random) -> List[Tuple[int, int]]:
+        """
+        One layout drawn uniformly from all of them, as (size, mask) pairs.
+        Call after solve() found at least one layout.
+        """
+        state: State = (self.sizes, 0, 0)
+        layout = []
+        while state[0]:
+            # Each move is taken in proportion to the layouts it leads to
+            pick = rng.randrange(self.counts[state])
+            for mask, child in self.edges[state]:
+                pick -= self.counts[child]
+                if pick < 0:
+                    break
+            layout.append((mask.bit_count(), mask))
+            state = child
+        return layout
+
+
+def random_fleet(height: int, width: int, sizes, occupied: int, rng: random.Random,
+                 max_nodes: int = PLACEMENT_MAX_NODES) -> Optional[List[int]]:
+    """
+    Lay out a whole fleet at random on the cells outside `occupied`.
+
+    Returns one placement mask per entry of `sizes`, in the same order,
+    or None when no layout fits. Work is bounded: FLEET_DRAWS draws of
+    the whole fleet (uniform over layouts whenever one succeeds, which is
+    almost always on open boards), then an exact count of every layout
+    sampled uniformly (crowded boards), then a randomized backtracking
+    search; the last two each stop after max_nodes states. None is
+    certain when the count finishes at zero; after a search that ran out
+    of nodes it means no layout was found.
+    """
+    sizes = list(sizes)
+    free = (1 << (height * width)) - 1 & ~occupied
+    if not sizes:
+        return []
+    if sum(sizes) > free.bit_count():
+        return None
+
+    # Whole fleet at once: every ship drawn from all on-board placements,
+    # kept only if nothing overlaps
+    column = {size: sum(1 << (i * width) for i in range(size)) for size in set(sizes)}
+    for _ in range(FLEET_DRAWS):
+        taken = occupied
+        layout = []
+        for size in sizes:
+            across = height * max(0, width - size + 1)
+            down = max(0, height - size + 1) * width if size > 1 else 0
+            pick = rng.randrange(across + down)
+            if pick < across:
+                y, x = divmod(pick, width - size + 1)
+                mask = ((1 << size) - 1) << (y * width + x)
+            else:
+                y, x = divmod(pick - across, width)
+                mask = column[size] << (y * width + x)
+            if mask & taken:
+                break
+            taken |= mask
+            layout.append(mask)
+        else:
+            return layout
+
+    # Crowded: count every layout, then walk the count tree at random
+    solver = FleetSolver(height, width, sizes, occupied, 0, max_nodes=max_nodes)
+    if any(not solver.placements[size] for size in solver.sizes):
+        return None
+    solution = solver.solve()
+    if solution is not None:
+        if not solution.arrangements:
+            return None
+        placed = solver.sample(rng)
+    else:
+        placed = backtrack(solver, occupied, rng, max_nodes)
+        if placed is None:
+            return None
+
+    # Back to the caller's order of sizes
+    by_size: Dict[int, List[int]] = {}
+    for size, mask in placed:
+        by_size.setdefault(size, []).append(mask)
+    return [by_size[size].pop() for size in sizes]
+
+
+def backtrack(solver: FleetSolver, occupied: int, rng: random.Random,
+              max_nodes: int) -> Optional[List[Tuple[int, int]]]:
+    """Depth-first search for any layout, largest ship first, trying placements in random order."""
+    sizes = sorted(solver.sizes, reverse=True)
+    nodes = 0
+
+    def place(i: int, taken: int) -> Optional[List[Tuple[int, int]]]:
+        nonlocal nodes
+        if i == len(sizes):
+            return []
+        nodes += 1
+        if nodes > max_nodes:
+            raise BudgetExceeded
+        options = [mask for mask in solver.placements[sizes[i]] if not mask & taken]
+        rng.shuffle(options)
+        for mask in options:
+            rest = place(i + 1, taken | mask)
+            if rest is not None:
+                return [(sizes[i], mask)] + rest
+        return None
+
+    try:
+        return place(0, occupied)
+    except BudgetExceeded:
+        return None
+
+
+def solve(height: int, width: int, sizes, misses: int, hits: int,
+          max_nodes: Optional[int] = None, budget: Optional[float] = None,
+          max_bound: Optional[int] = None) -> Optional[Solution]:
+    """
+    Exact layout count and per-cell weights, or None when the search is
+    over max_nodes, budget seconds, or (checked up front) max_bound.
+    """
+    deadline = time.monotonic() + budget if budget is not None else None
+    solver = FleetSolver(height, width, sizes, misses, hits, max_nodes, deadline)
+    if max_bound is not None and solver.upper_bound() > max_bound:
+        return None
+    return solver.solve()
+
+
+def solve_attack(atk, max_nodes: Optional[int] = None, budget: Optional[float] = None,
+                 max_bound: Optional[int] = None) -> Optional[Solution]:
+    """solve() for what Attack `atk` knows about its opponent's board."""
+    obj = atk.obj
+    return solve(obj.height, obj.width, obj.typebyID.values(), atk.miss_mask,
+                 atk.hit_mask & obj.taken_mask, max_nodes, budget, max_bound)
+
+
+def main(argv=None):
+    # Imported here: src.battleship imports this module for its "exact" strategy
+    from src.battleship import Game
+
+    parser = argparse.ArgumentParser(description="Solve the computer's view of a headless game.")
+    parser.add_argument('--turns', type=int, default=150, help="moves played before solving")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=1.0, help="seconds before giving up")
+    args = parser.parse_args(argv)
+
+    game = Game(headless=True, rng=random.Random(args.seed))
+    game.start()
+    while game.turns < args.turns and game.get_winner() is None:
+        game.play_turn()
+
+    atk = game.p2_atk
+    start = time.perf_counter()
+    solution = solve_attack(atk, budget=args.budget)
+    elapsed = time.perf_counter() - start
+    print(f"turn {game.turns}: ships {sorted(atk.obj.typebyID.values())}, "
+          f"{atk.miss_mask.bit_count()} misses, {(atk.hit_mask & atk.obj.taken_mask).bit_count()} live hits")
+    if solution is None:
+        print(f"gave up after {elapsed:.3f}s")
+        return
+
+    print(f"{solution.arrangements} layouts, {solution.nodes} nodes, {elapsed:.3f}s")
+    width = atk.obj.width
+    for y in range(atk.obj.height):
+        row = []
+        for x in range(width):
+            idx = y * width + x
+            if (atk.miss_mask >> idx) & 1:
+                row.append("  . ")
+            elif (atk.hit_mask >> idx) & 1:
+                row.append("  X ")
+            else:
+                row.append(f"{solution.probability(idx):4.0%}")
+        print(' '.join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+tournament.py
+
+Run many headless AI-vs-AI games across all CPU cores and
+merge the results into one set of statistics.
+
+Games are split into shards. Each shard runs in a worker process with
+its own seed, and the merged statistics are yielded after every shard
+so a long run can be watched while it is still going.
+
+Usage:
+    python -m src.tournament 100000 --workers 8 --seed 1
+"""
+
+import argparse
+import os
+import random
+import sys
+from multiprocessing import Pool
+from typing import Dict, Iterator, Optional, Tuple
+
+from src.battleship import STRATEGIES, Game
+
+
+class TournamentStats:
+    """Mergeable counters for a batch of games."""
+
+    def __init__(self):
+        self.games = 0
+        self.wins: Dict[str, int] = {'Player': 0, 'Computer': 0}
+        self.ties = 0              # get_winner's tie message
+        self.unfinished = 0        # Games that hit max_turns; kept out of everything below
+        self.turns = 0             # Moves played, over finished games
+        self.by_score = 0          # Games decided on remaining ship points
+        self.ships_earned = 0      # Ships sunk and handed to the attacker
+        self.deferred = 0          # Turns an earned ship waited in to_place
+        self.games_with_deferral = 0
+        # Winner's shot count -> number of games (keeps percentiles mergeable)
+        self.shots_to_win: Dict[int, int] = {}
+
+    def add(self, result):
+        """Count one GameResult."""
+        self.games += 1
+        if result.winner is None:
+            # Cut off at max_turns: neither side won, and its turns, sinks
+            # and deferrals would swamp the finished games' averages
+            self.unfinished += 1
+            return
+
+        self.turns += result.turns
+        if result.winner in self.wins:
+            self.wins[result.winner] += 1
+            shots = result.p1_shots if result.winner == 'Player' else result.p2_shots
+            self.shots_to_win[shots] = self.shots_to_win.get(shots, 0) + 1
+        else:
+            self.ties += 1
+
+        if result.by_score:
+            self.by_score += 1
+        self.ships_earned += result.p1_ships_earned + result.p2_ships_earned
+        deferred = result.p1_deferred + result.p2_deferred
+        self.deferred += deferred
+        if deferred:
+            self.games_with_deferral += 1
+
+    def merge(self, other: "TournamentStats"):
+        """Fold another shard's counters into this one."""
+        self.games += other.games
+        for side in self.wins:
+            self.wins[side] += other.wins[side]
+        self.ties += other.ties
+        self.unfinished += other.unfinished
+        self.turns += other.turns
+        self.by_score += other.by_score
+        self.ships_earned += other.ships_earned
+        self.deferred += other.deferred
+        self.games_with_deferral += other.games_with_deferral
+        for shots, count in other.shots_to_win.items():
+            self.shots_to_win[shots] = self.shots_to_win.get(shots, 0) + count
+
+    def percentile(self, pct: float) -> Optional[int]:
+        """Shots-to-win at the given percentile (0-100), or None if no wins."""
+        total = sum(self.shots_to_win.values())
+        if not total:
+            return None
+        rank = pct / 100 * total
+        seen = 0
+        for shots in sorted(self.shots_to_win):
+            seen += self.shots_to_win[shots]
+            if seen >= rank:
+                return shots
+        return max(self.shots_to_win)
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Aggregate rates and shot statistics as a plain dict. Rates and
+        averages are over finished games; games cut off at max_turns are
+        only counted in 'unfinished' and 'unfinished_rate'.
+        """
+        finished = self.games - self.unfinished
+        games = finished or 1
+        decided = sum(self.shots_to_win.values())
+        mean_shots = (
+            sum(shots * count for shots, count in self.shots_to_win.items()) / decided
+            if decided else None
+        )
+        return {
+            'games': self.games,
+            'unfinished': self.unfinished,
+            'unfinished_rate': self.unfinished / (self.games or 1),
+            'finished': finished,
+            'player_win_rate': self.wins['Player'] / games,
+            'computer_win_rate': self.wins['Computer'] / games,
+            'tie_rate': self.ties / games,
+            'score_decided_rate': self.by_score / games,
+            'mean_turns': self.turns / finished if finished else None,
+            'mean_shots_to_win': mean_shots,
+            'p50_shots_to_win': self.percentile(50),
+            'p90_shots_to_win': self.percentile(90),
+            'p99_shots_to_win': self.percentile(99),
+            'ships_earned_per_game': self.ships_earned / games,
+            'deferrals_per_game': self.deferred / games,
+            'games_with_deferral_rate': self.games_with_deferral / games,
+        }
+
+
+def play_shard(task: Tuple[int, int, Tuple[str, str]]) -> TournamentStats:
+    """
+    Worker entry point: play a shard of games with its own seed.
+
+    Parameters:
+        task: (seed, number of games, (p1 strategy, p2 strategy))
+    """
+    seed, games, (p1_strategy, p2_strategy) = task
+    # One stream per shard, so results do not depend on which worker ran it
+    rng = random.Random(seed)
+
+    stats = TournamentStats()
+    for _ in range(games):
+        game = Game(headless=True, p1_strategy=p1_strategy, p2_strategy=p2_strategy, rng=rng)
+        stats.add(game.run_headless())
+    return stats
+
+
+def shard_tasks(games: int, shard_size: int, seed: int,
+                strategies: Tuple[str, str]) -> Iterator[Tuple[int, int, Tuple[str, str]]]:
+    """Split the run into (seed, size, strategies) shards; each shard gets a distinct seed."""
+    index = 0
+    while games > 0:
+        size = min(shard_size, games)
+        yield ((seed << 32) | index, size, strategies)
+        games -= size
+        index += 1
+
+
+def run_tournament(games: int, workers: Optional[int] = None, seed: int = 0,
+                   shard_size: int = 250,
+                   strategies: Tuple[str, str] = ("parity", "parity")) -> Iterator[TournamentStats]:
+    """
+    Play `games` headless games on a process pool.
+
+    Yields the running merged TournamentStats after every finished shard;
+    the last value yielded covers the whole run.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = TournamentStats()
+    tasks = shard_tasks(games, shard_size, seed, strategies)
+
+    if workers == 1:
+        # Skip the pool entirely; same results, less overhead
+        for task in tasks:
+            total.merge(play_shard(task))
+            yield total
+        return
+
+    with Pool(workers) as pool:
+        # Unordered so a slow shard never holds back the stream
+        for stats in pool.imap_unordered(play_shard, tasks):
+            total.merge(stats)
+            yield total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a headless AI-vs-AI tournament.")
+    parser.add_argument('games', type=int, help="number of games to play")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0, help="base seed for the shards")
+    parser.add_argument('--shard-size', type=int, default=250, help="games per shard")
+    parser.add_argument('--p1-strategy', choices=STRATEGIES, default="parity")
+    parser.add_argument('--p2-strategy', choices=STRATEGIES, default="parity")
+    args = parser.parse_args(argv)
+
+    strategies = (args.p1_strategy, args.p2_strategy)
+    stats = TournamentStats()
+    for stats in run_tournament(args.games, args.workers, args.seed, args.shard_size, strategies):
+        # Partial results after every shard
+        partial = stats.summary()
+        turns = partial['mean_turns']
+        turns_text = "-" if turns is None else f"{turns:.1f}"
+        print(f"{stats.games}/{args.games} games: "
+              f"Player {partial['player_win_rate']:.1%}, Computer {partial['computer_win_rate']:.1%}, "
+              f"unfinished {partial['unfinished']}, mean turns {turns_text}",
+              file=sys.stderr, flush=True)
+
+    for key, value in stats.summary().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()